@@ -4,8 +4,10 @@ import shutil
 from pathlib import Path
 
 from dotenv import dotenv_values
-from lamin_utils import logger
+from lamin_utils import colors, logger
 
+from .core._cache_manager import close_cache_manager, get_cache_manager
+from .core._hash_cache import close_hash_cache
 from .core._settings_save import save_platform_user_storage_settings
 from .core._settings_store import system_settings_file
 from .errors import CurrentInstanceNotConfigured
@@ -25,6 +27,8 @@ def clear_cache_dir():
 
     cache_dir = settings.cache_dir
     if cache_dir.exists():
+        close_hash_cache()
+        close_cache_manager()
         shutil.rmtree(cache_dir)
         cache_dir.mkdir()
         logger.success("the cache directory was cleared")
@@ -38,6 +42,39 @@ def get_cache_dir():
     return settings.cache_dir.as_posix()
 
 
+def get_cache_stats() -> dict:
+    """The size, the hit rate and the bytes saved by the cache directory."""
+    return get_cache_manager().stats()
+
+
+def show_cache_stats() -> None:
+    from lamindb_setup import settings
+
+    stats = get_cache_stats()
+    max_size = stats["max_size"]
+    print(
+        f"{colors.cyan('Cache:')} {settings.cache_dir.as_posix()}\n"
+        f" - size: {_format_bytes(stats['size'])} of"
+        f" {'unlimited' if max_size is None else _format_bytes(max_size)}"
+        f" in {stats['n_entries']} entries\n"
+        f" - hit rate: {stats['hit_rate']:.1%}"
+        f" ({stats['hits']} hits, {stats['misses']} misses)\n"
+        f" - bytes saved: {_format_bytes(stats['bytes_saved'])},"
+        f" downloaded: {_format_bytes(stats['bytes_downloaded'])}\n"
+        f" - evictions: {stats['n_evictions']}"
+        f" ({_format_bytes(stats['bytes_evicted'])})"
+    )
+
+
+def _format_bytes(n_bytes: int) -> str:
+    size = float(n_bytes)
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if size < 1024 or unit == "TiB":
+            break
+        size /= 1024
+    return f"{size:.1f} {unit}" if unit != "B" else f"{n_bytes} B"
+
+
 def set_cache_dir(cache_dir: str):
     from lamindb_setup.core._settings import (
         DEFAULT_CACHE_DIR,
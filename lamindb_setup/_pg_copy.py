@@ -0,0 +1,153 @@
+"""Encoding of arrow data in the binary format of PostgreSQL's `COPY`.
+
+The binary format is a header, one tuple per row and a trailer. A tuple is the
+field count as int16 followed by every field as its int32 byte length (-1 for NULL)
+and the value in the binary representation of the column type, all big-endian.
+
+Rows are encoded column by column with numpy: the byte offsets of all fields are
+computed from the lengths of the values and the values are scattered into the
+output buffer, so there is no Python code per row or per value.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import numpy as np
+    import pyarrow as pa
+
+HEADER = b"PGCOPY\n\xff\r\n\x00" + (0).to_bytes(4, "big") + (0).to_bytes(4, "big")
+TRAILER = (-1).to_bytes(2, "big", signed=True)
+# microseconds and days between the unix epoch and the PostgreSQL epoch 2000-01-01
+POSTGRES_EPOCH_US = 946_684_800_000_000
+POSTGRES_EPOCH_DAYS = 10_957
+
+# PostgreSQL types by the numpy type of their binary representation
+_FIXED_WIDTH_TYPES = {
+    "boolean": "u1",
+    "smallint": ">i2",
+    "integer": ">i4",
+    "bigint": ">i8",
+    "real": ">f4",
+    "double precision": ">f8",
+    "timestamp with time zone": ">i8",
+    "timestamp without time zone": ">i8",
+    "date": ">i4",
+}
+_TEXT_TYPES = {"text", "character varying", "character", "json", "jsonb"}
+SUPPORTED_TYPES = set(_FIXED_WIDTH_TYPES) | _TEXT_TYPES
+
+
+def _fixed_width_values(array: pa.Array, pg_type: str) -> np.ndarray:
+    """The values of an array as numbers of the binary representation, nulls are 0."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pg_type in {"timestamp with time zone", "timestamp without time zone"}:
+        if pa.types.is_timestamp(array.type) and array.type.tz is not None:
+            # timestamps are stored in UTC, drop the zone without shifting the values
+            array = pc.cast(array, pa.timestamp(array.type.unit))
+        array = pc.cast(pc.cast(array, pa.timestamp("us"), safe=False), pa.int64())
+        offset = POSTGRES_EPOCH_US
+    elif pg_type == "date":
+        array = pc.cast(pc.cast(array, pa.date32()), pa.int32())
+        offset = POSTGRES_EPOCH_DAYS
+    else:
+        arrow_type = {
+            "boolean": pa.bool_(),
+            "smallint": pa.int16(),
+            "integer": pa.int32(),
+            "bigint": pa.int64(),
+            "real": pa.float32(),
+            "double precision": pa.float64(),
+        }[pg_type]
+        array = pc.cast(array, arrow_type)
+        offset = 0
+    values = pc.fill_null(array, False if pg_type == "boolean" else 0)
+    return values.to_numpy(zero_copy_only=False) - offset
+
+
+def _encode_column(array: pa.Array, pg_type: str):
+    """The field lengths and the concatenated values of the non-null fields."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    valid = ~np.asarray(array.is_null(), dtype=bool)
+    if pg_type in _FIXED_WIDTH_TYPES:
+        dtype = np.dtype(_FIXED_WIDTH_TYPES[pg_type])
+        values = _fixed_width_values(array, pg_type)[valid].astype(dtype)
+        lengths = np.where(valid, dtype.itemsize, -1)
+        return lengths, values.view(np.uint8)
+    array = pc.cast(array, pa.large_string())
+    offsets = np.frombuffer(array.buffers()[1], dtype=np.int64)
+    offsets = offsets[array.offset : array.offset + len(array) + 1]
+    data = np.frombuffer(array.buffers()[2] or b"", dtype=np.uint8)
+    starts = offsets[:-1][valid]
+    text_lengths = (offsets[1:] - offsets[:-1])[valid]
+    # the bytes of the valid values, which aren't contiguous if there are null slots
+    total = int(text_lengths.sum())
+    shifts = np.repeat(starts - (np.cumsum(text_lengths) - text_lengths), text_lengths)
+    text = data[shifts + np.arange(total)]
+    if pg_type == "jsonb":
+        # jsonb values start with the version of their format
+        prefixed = np.empty(total + len(text_lengths), dtype=np.uint8)
+        prefix_positions = np.cumsum(text_lengths + 1) - (text_lengths + 1)
+        prefixed[prefix_positions] = 1
+        mask = np.ones(len(prefixed), dtype=bool)
+        mask[prefix_positions] = False
+        prefixed[mask] = text
+        text, text_lengths = prefixed, text_lengths + 1
+    lengths = np.full(len(array), -1, dtype=np.int64)
+    lengths[valid] = text_lengths
+    return lengths, text
+
+
+def encode_batch(columns: list[pa.Array], pg_types: list[str]) -> bytes:
+    """Encode the rows of equally long arrow arrays as tuples of the binary format."""
+    import numpy as np
+
+    n_rows = len(columns[0]) if columns else 0
+    if n_rows == 0:
+        return b""
+    encoded = [
+        _encode_column(array, pg_type)
+        for array, pg_type in zip(columns, pg_types, strict=True)
+    ]
+    value_sizes = sum(np.maximum(lengths, 0) for lengths, _ in encoded)
+    row_sizes = 2 + 4 * len(columns) + value_sizes
+    row_starts = np.cumsum(row_sizes) - row_sizes
+    out = np.empty(int(row_sizes.sum()), dtype=np.uint8)
+
+    def scatter(positions: np.ndarray, values: np.ndarray, width: int) -> None:
+        out[(positions[:, None] + np.arange(width)).ravel()] = values
+
+    field_count = np.full(n_rows, len(columns), dtype=">i2")
+    scatter(row_starts, field_count.view(np.uint8), 2)
+    positions = row_starts + 2
+    for lengths, values in encoded:
+        scatter(positions, lengths.astype(">i4").view(np.uint8), 4)
+        positions = positions + 4
+        sizes = np.maximum(lengths, 0)
+        valid = lengths >= 0
+        value_starts = positions[valid]
+        value_sizes = sizes[valid]
+        shifts = np.repeat(
+            value_starts - (np.cumsum(value_sizes) - value_sizes), value_sizes
+        )
+        out[shifts + np.arange(len(values))] = values
+        positions = positions + sizes
+    return out.tobytes()
+
+
+def encode_table(
+    table: pa.Table, pg_types: list[str], batch_size: int = 65_536
+) -> Iterator[bytes]:
+    """Encode an arrow table as a binary `COPY` stream, `batch_size` rows at a time."""
+    yield HEADER
+    for batch in table.to_batches(max_chunksize=batch_size):
+        yield encode_batch(batch.columns, pg_types)
+    yield TRAILER
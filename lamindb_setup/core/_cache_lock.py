@@ -0,0 +1,141 @@
+"""Cross-process locks of cache entries.
+
+A lock is a file next to the cache entry that is created with `O_EXCL`, so only
+one process on a node downloads an entry while the others wait and reuse it.
+The holder touches the lock file regularly, a lock file that wasn't touched for
+`STALE_LOCK_SECONDS` or that belongs to a dead process on this host is removed.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+LOCK_SUFFIX = ".lock"
+PARTIAL_SUFFIX = ".partial"
+HEARTBEAT_SECONDS = 10.0
+STALE_LOCK_SECONDS = 60.0
+_MAX_POLL_SECONDS = 1.0
+
+
+def lock_path(path: Path) -> Path:
+    return path.with_name(path.name + LOCK_SUFFIX)
+
+
+def partial_path(path: Path) -> Path:
+    return path.with_name(path.name + PARTIAL_SUFFIX)
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _is_stale(lock: Path, stat: os.stat_result, stale_after: float) -> bool:
+    if time.time() - stat.st_mtime > stale_after:
+        return True
+    try:
+        hostname, pid = lock.read_text().rsplit(":", 1)
+    except (OSError, ValueError):
+        # the lock file is being written
+        return False
+    if hostname != socket.gethostname():
+        return False
+    import psutil
+
+    return not psutil.pid_exists(int(pid))
+
+
+def is_locked(path: Path, stale_after: float = STALE_LOCK_SECONDS) -> bool:
+    """Whether a cache entry has a lock that isn't stale."""
+    lock = lock_path(path)
+    try:
+        stat = lock.stat()
+    except FileNotFoundError:
+        return False
+    return not _is_stale(lock, stat, stale_after)
+
+
+def _try_acquire(lock: Path) -> bool:
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(_owner())
+    return True
+
+
+def _heartbeat(lock: Path, stop: threading.Event) -> None:
+    while not stop.wait(HEARTBEAT_SECONDS):
+        try:
+            os.utime(lock)
+        except OSError:
+            return
+
+
+@contextmanager
+def lock_cache_entry(
+    path: Path,
+    timeout: float | None = None,
+    stale_after: float = STALE_LOCK_SECONDS,
+) -> Iterator[bool]:
+    """Lock a cache entry across processes, yields whether the lock was acquired.
+
+    If another process holds the lock, wait until it releases the lock and yield
+    `False` without acquiring it, the entry was just synchronized by the holder.
+
+    Args:
+        path: The path of the cache entry.
+        timeout: The maximal number of seconds to wait, `None` waits as long as
+            the holder is alive.
+        stale_after: The number of seconds after which a lock file that wasn't
+            touched by its holder is removed.
+    """
+    lock = lock_path(path)
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    start = time.monotonic()
+    poll = 0.05
+    has_holder = False
+    while has_holder or not _try_acquire(lock):
+        try:
+            stat = lock.stat()
+        except FileNotFoundError:
+            if has_holder:
+                # the holder is done
+                yield False
+                return
+            continue
+        if _is_stale(lock, stat, stale_after):
+            from lamin_utils import logger
+
+            logger.warning(f"removing the stale lock {lock.as_posix()}")
+            # don't remove a lock that was replaced in the meantime
+            try:
+                if lock.stat().st_ino == stat.st_ino:
+                    lock.unlink()
+            except FileNotFoundError:
+                pass
+            has_holder = False
+            continue
+        has_holder = True
+        if timeout is not None and time.monotonic() - start > timeout:
+            raise TimeoutError(f"waited {timeout}s for the lock {lock.as_posix()}")
+        time.sleep(poll)
+        poll = min(poll * 2, _MAX_POLL_SECONDS)
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(lock, stop), daemon=True)
+    heartbeat.start()
+    try:
+        yield True
+    finally:
+        stop.set()
+        heartbeat.join()
+        lock.unlink(missing_ok=True)
@@ -0,0 +1,571 @@
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+from ._cache_lock import LOCK_SUFFIX, PARTIAL_SUFFIX, is_locked
+from ._hash_cache import HASH_CACHE_FILENAME
+from ._ranged_download import STATE_SUFFIX
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+CACHE_INDEX_FILENAME = ".cache_index.sqlite"
+EVICTION_POLICIES = ("lru", "lfu")
+
+_CREATE_ENTRIES = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    accessed INTEGER NOT NULL,
+    n_accesses INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+_CREATE_ENTRIES_INDEX = (
+    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+)
+# pins are per process, so that pins of crashed processes can be discarded
+_CREATE_PINS = """
+CREATE TABLE IF NOT EXISTS pins (
+    key TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    PRIMARY KEY (key, pid)
+) WITHOUT ROWID
+"""
+_CREATE_STATS = """
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+# the cached files of directories, to check them for updates without a scan
+_CREATE_FILES = """
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    etag TEXT
+) WITHOUT ROWID
+"""
+# the directories whose files are all in the files table
+_CREATE_DIRECTORIES = """
+CREATE TABLE IF NOT EXISTS directories (
+    key TEXT PRIMARY KEY
+) WITHOUT ROWID
+"""
+# the modification times of the folders of indexed files, a locally deleted file
+# changes the modification time of its folder
+_CREATE_FOLDERS = """
+CREATE TABLE IF NOT EXISTS folders (
+    key TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+_EVICTION_ORDER = {
+    "lru": "accessed",
+    "lfu": "n_accesses, accessed",
+}
+_SIZE_UNITS = {
+    "": 1,
+    "b": 1,
+    "kb": 1000,
+    "mb": 1000**2,
+    "gb": 1000**3,
+    "tb": 1000**4,
+    "kib": 1024,
+    "mib": 1024**2,
+    "gib": 1024**3,
+    "tib": 1024**4,
+}
+
+
+def parse_size(size: int | str | None) -> int | None:
+    """Parse a number of bytes like `50GB` or `512MiB`, `None` means no limit."""
+    if size is None or isinstance(size, int):
+        return size
+    size = size.strip()
+    if size.lower() in {"", "null", "none"}:
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]*)", size)
+    if match is None or match.group(2).lower() not in _SIZE_UNITS:
+        raise ValueError(f"Invalid size {size!r}, use bytes or a unit like 50GB.")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+class IndexedStat(NamedTuple):
+    """The stat of a cached file as recorded in the index."""
+
+    st_size: int
+    st_mtime: float
+    etag: str | None = None
+
+
+def _key_range(key: str) -> tuple[str, str]:
+    # the keys below a directory key sort between "key/" and "key0"
+    return key + "/", key + "0"
+
+
+def _path_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+    return path.stat().st_size
+
+
+# the files of unfinished downloads and temporary files aren't cache entries
+_SKIPPED_SUFFIXES = (LOCK_SUFFIX, PARTIAL_SUFFIX, STATE_SUFFIX, ".tmp")
+# the files that mark a directory as a store which is only usable as a whole
+_STORE_MARKERS = (".zarray", ".zgroup", "zarr.json", "__tiledb_group.tdb")
+
+
+def _is_synchronized_directory(path: Path) -> bool:
+    # stores like store.zarr, folder artifacts in .lamindb and marked stores
+    # are synchronized as a whole and can't be evicted file by file
+    return (
+        path.suffix != ""
+        or path.parent.name == ".lamindb"
+        or any((path / marker).exists() for marker in _STORE_MARKERS)
+    )
+
+
+def _pid_exists(pid: int) -> bool:
+    import psutil
+
+    return psutil.pid_exists(pid)
+
+
+class CacheManager:
+    """Size-capped cache of the local copies of cloud files in the cache directory.
+
+    Every entry is a file or a directory that was synchronized by `cloud_to_local`.
+    Accesses are tracked in a SQLite index in the cache directory and, if the size
+    of the cache exceeds `max_size`, the least recently (`"lru"`) or the least
+    frequently (`"lfu"`) used entries are deleted. Pinned entries are never deleted.
+
+    Only pinned entries and entries that are locked for synchronization are
+    protected: `enforce` may delete an entry that another process is still reading.
+    Wrap the use of a cached path in `pinned` if it must outlive concurrent cache
+    writes, like the instance's SQLite file.
+
+    Entries that were cached before the index existed are registered on its
+    creation. A directory counts as one entry if it looks like it was synchronized
+    as a whole: a store with a suffix like `.zarr`, a folder artifact in
+    `.lamindb` or a directory with zarr or tiledb metadata.
+
+    Args:
+        cache_dir: The cache directory.
+        max_size: The maximal size of all entries in bytes, `None` means no limit.
+        policy: The eviction policy, `"lru"` or `"lfu"`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_size: int | None = None,
+        policy: Literal["lru", "lfu"] = "lru",
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"policy should be one of {EVICTION_POLICIES}.")
+        self.cache_dir = cache_dir
+        self.path = cache_dir / CACHE_INDEX_FILENAME
+        self.max_size = max_size
+        self.policy = policy
+        self._lock = threading.Lock()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        is_new = not self.path.exists()
+        # the lock above serializes access from different threads
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute(_CREATE_ENTRIES)
+            self._conn.execute(_CREATE_ENTRIES_INDEX)
+            self._conn.execute(_CREATE_PINS)
+            self._conn.execute(_CREATE_STATS)
+            self._conn.execute(_CREATE_FILES)
+            self._conn.execute(_CREATE_DIRECTORIES)
+            self._conn.execute(_CREATE_FOLDERS)
+        if is_new:
+            self._register_existing_files()
+
+    def _key(self, path: Path) -> str | None:
+        path = Path(path).resolve()
+        if not path.is_relative_to(self.cache_dir.resolve()):
+            return None
+        key = path.relative_to(self.cache_dir.resolve()).as_posix()
+        return None if key == "." else key
+
+    def _register_existing_files(self) -> None:
+        # the entries cached before the index existed, accessed at their mtime
+        rows = []
+
+        def register(directory: Path, is_root: bool) -> None:
+            for dir_entry in os.scandir(directory):
+                name = dir_entry.name
+                if name.endswith(_SKIPPED_SUFFIXES):
+                    continue
+                path = Path(dir_entry.path)
+                try:
+                    if dir_entry.is_dir(follow_symlinks=False):
+                        # the children of the cache root are buckets or instances
+                        if is_root or not _is_synchronized_directory(path):
+                            register(path, is_root=False)
+                            continue
+                        size = _path_size(path)
+                    elif dir_entry.is_file() and not name.startswith("."):
+                        size = dir_entry.stat().st_size
+                    else:
+                        continue
+                    mtime = dir_entry.stat().st_mtime_ns
+                except OSError:
+                    continue
+                rows.append((self._key(path), size, mtime, 1))
+
+        register(self.cache_dir, is_root=True)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?)", rows
+            )
+
+    def _add_stats(self, **values: int) -> None:
+        self._conn.executemany(
+            "INSERT INTO stats VALUES (?, ?) ON CONFLICT (name)"
+            " DO UPDATE SET value = value + excluded.value",
+            values.items(),
+        )
+
+    def record_access(self, path: Path, downloaded: bool) -> None:
+        """Record an access of a synchronized path, `downloaded` is a cache miss."""
+        key = self._key(path)
+        if key is None or not path.exists():
+            return
+        parts = key.split("/")
+        ancestors = ["/".join(parts[:i]) for i in range(1, len(parts))]
+        now = time.time_ns()
+        with self._lock, self._conn:
+            # a file in a cached directory belongs to the entry of the directory
+            row = self._conn.execute(
+                "SELECT key, size FROM entries WHERE key IN"
+                f" ({', '.join('?' * len(ancestors))}) ORDER BY length(key) LIMIT 1",
+                ancestors,
+            ).fetchone()
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT key, size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and not downloaded:
+                entry_key, size = row
+            else:
+                entry_key = key if row is None else row[0]
+                size = self._indexed_size(entry_key)
+                if size is None:
+                    size = _path_size(self.cache_dir / entry_key)
+            if path.is_dir():
+                # the files of a directory are tracked as one entry
+                prefix = entry_key + "/"
+                self._conn.execute(
+                    "DELETE FROM entries WHERE substr(key, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            self._conn.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, 1) ON CONFLICT (key) DO UPDATE"
+                " SET size = excluded.size, accessed = excluded.accessed,"
+                " n_accesses = n_accesses + 1",
+                (entry_key, size, now),
+            )
+            if downloaded:
+                self._add_stats(misses=1, bytes_downloaded=size)
+            else:
+                self._add_stats(hits=1, bytes_saved=size)
+
+    def _indexed_size(self, key: str) -> int | None:
+        if not self._conn.execute(
+            "SELECT 1 FROM directories WHERE key = ?", (key,)
+        ).fetchone():
+            return None
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM files WHERE key > ? AND key < ?",
+            _key_range(key),
+        ).fetchone()[0]
+
+    def indexed_files(self, directory: Path) -> dict[Path, IndexedStat] | None:
+        """The indexed files of a cached directory, `None` if it isn't indexed."""
+        key = self._key(directory)
+        if key is None or not directory.exists():
+            return None
+        root = self.cache_dir.resolve()
+        with self._lock:
+            if not self._conn.execute(
+                "SELECT 1 FROM directories WHERE key = ?", (key,)
+            ).fetchone():
+                return None
+            rows = self._conn.execute(
+                "SELECT key, size, mtime, etag FROM files WHERE key > ? AND key < ?",
+                _key_range(key),
+            ).fetchall()
+        return {root / row[0]: IndexedStat(*row[1:]) for row in rows}
+
+    def index_files(
+        self,
+        directory: Path,
+        files: dict[Path, IndexedStat],
+        replace: bool = False,
+    ) -> None:
+        """Record the files of a cached directory.
+
+        If `replace` is `True`, `files` are all files of the directory, otherwise
+        they are added to the already indexed files.
+        """
+        key = self._key(directory)
+        if key is None:
+            return
+        rows = [
+            (file_key, *stat)
+            for path, stat in files.items()
+            if (file_key := self._key(path)) is not None
+        ]
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute(
+                    "DELETE FROM files WHERE key > ? AND key < ?", _key_range(key)
+                )
+                self._conn.execute(
+                    "DELETE FROM folders WHERE key = ? OR (key > ? AND key < ?)",
+                    (key, *_key_range(key)),
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute("INSERT OR IGNORE INTO directories VALUES (?)", (key,))
+            self._record_folders({path.parent for path in files})
+
+    def remove_files(self, paths: Iterable[Path]) -> None:
+        """Remove deleted files from the index."""
+        paths = list(paths)
+        keys = [(key,) for path in paths if (key := self._key(path)) is not None]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM files WHERE key = ?", keys)
+            self._record_folders({path.parent for path in paths})
+
+    def record_folders(self, folders: Iterable[Path]) -> None:
+        """Record the current modification times of folders of indexed files."""
+        with self._lock, self._conn:
+            self._record_folders(folders)
+
+    def _record_folders(self, folders: Iterable[Path]) -> None:
+        for folder in folders:
+            key = self._key(folder)
+            if key is None:
+                continue
+            try:
+                mtime_ns = folder.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._conn.execute("DELETE FROM folders WHERE key = ?", (key,))
+                continue
+            self._conn.execute(
+                "INSERT OR REPLACE INTO folders VALUES (?, ?)", (key, mtime_ns)
+            )
+
+    def changed_folders(self, directory: Path) -> set[Path]:
+        """The folders of the indexed files of a directory that changed locally.
+
+        Only the folders are checked, so that a deleted file is found without a
+        scan of all files.
+        """
+        key = self._key(directory)
+        if key is None:
+            return set()
+        root = self.cache_dir.resolve()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, mtime_ns FROM folders WHERE key = ? OR (key > ? AND key < ?)",
+                (key, *_key_range(key)),
+            ).fetchall()
+        changed = set()
+        for folder_key, mtime_ns in rows:
+            folder = root / folder_key
+            try:
+                if folder.stat().st_mtime_ns == mtime_ns:
+                    continue
+            except FileNotFoundError:
+                pass
+            changed.add(folder)
+        return changed
+
+    def _pinned_keys(self) -> set[str]:
+        pins = self._conn.execute("SELECT key, pid FROM pins").fetchall()
+        stale = [(key, pid) for key, pid in pins if not _pid_exists(pid)]
+        if stale:
+            self._conn.executemany("DELETE FROM pins WHERE key = ? AND pid = ?", stale)
+        return {key for key, pid in pins if (key, pid) not in stale}
+
+    def enforce(self, keep: Iterable[Path] = ()) -> list[str]:
+        """Evict entries until the cache fits into `max_size`, returns evicted keys.
+
+        Pinned entries, locked entries that are being synchronized and the entries
+        of the paths in `keep` are not evicted.
+        """
+        if self.max_size is None:
+            return []
+        keep_keys = {key for path in keep if (key := self._key(path)) is not None}
+        evicted: list[str] = []
+        with self._lock, self._conn:
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+            if total <= self.max_size:
+                return evicted
+            protected = self._pinned_keys() | keep_keys
+            bytes_evicted = 0
+            candidates = self._conn.execute(
+                f"SELECT key, size FROM entries ORDER BY {_EVICTION_ORDER[self.policy]}"
+            ).fetchall()
+            for key, size in candidates:
+                if total <= self.max_size:
+                    break
+                # a pinned file inside a directory entry protects the directory
+                if any(
+                    pinned == key or pinned.startswith(key + "/")
+                    for pinned in protected
+                ):
+                    continue
+                # another process synchronizes the entry
+                if is_locked(self.cache_dir / key):
+                    continue
+                self._remove(self.cache_dir / key)
+                evicted.append(key)
+                total -= size
+                bytes_evicted += size
+            if evicted:
+                self._conn.executemany(
+                    "DELETE FROM entries WHERE key = ?", ((key,) for key in evicted)
+                )
+                for key in evicted:
+                    self._conn.execute("DELETE FROM directories WHERE key = ?", (key,))
+                    self._conn.execute(
+                        "DELETE FROM folders WHERE key = ? OR (key > ? AND key < ?)",
+                        (key, *_key_range(key)),
+                    )
+                    self._conn.execute(
+                        "DELETE FROM files WHERE key > ? AND key < ?", _key_range(key)
+                    )
+                self._add_stats(n_evictions=len(evicted), bytes_evicted=bytes_evicted)
+        if total > self.max_size:
+            from lamin_utils import logger
+
+            logger.warning(
+                f"the cache directory {self.cache_dir.as_posix()} exceeds its maximal"
+                f" size {self.max_size} bytes, all remaining entries are pinned or in use"
+            )
+        return evicted
+
+    def _remove(self, path: Path) -> None:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+        # remove the directories that became empty
+        parent = path.parent
+        cache_dir = self.cache_dir.resolve()
+        while (
+            parent.exists()
+            and parent.resolve() != cache_dir
+            and next(parent.iterdir(), None) is None
+        ):
+            parent.rmdir()
+            parent = parent.parent
+
+    def pin(self, path: Path) -> None:
+        """Protect a path from eviction until `unpin` or the end of this process."""
+        if (key := self._key(path)) is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pins VALUES (?, ?)", (key, os.getpid())
+            )
+
+    def unpin(self, path: Path) -> None:
+        if (key := self._key(path)) is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM pins WHERE key = ? AND pid = ?", (key, os.getpid())
+            )
+
+    @contextmanager
+    def pinned(self, path: Path) -> Iterator[Path]:
+        """Pin a path while it is open."""
+        self.pin(path)
+        try:
+            yield path
+        finally:
+            self.unpin(path)
+
+    def stats(self) -> dict[str, int | float | None]:
+        """The size of the cache, the hit rate and the bytes saved by cache hits."""
+        with self._lock:
+            n_entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            counters = dict(self._conn.execute("SELECT name, value FROM stats"))
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "n_entries": n_entries,
+            "size": size,
+            "max_size": self.max_size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "bytes_saved": counters.get("bytes_saved", 0),
+            "bytes_downloaded": counters.get("bytes_downloaded", 0),
+            "n_evictions": counters.get("n_evictions", 0),
+            "bytes_evicted": counters.get("bytes_evicted", 0),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_CACHE_MANAGER: CacheManager | None = None
+_CACHE_MANAGER_LOCK = threading.Lock()
+
+
+def get_cache_manager() -> CacheManager:
+    """The cache manager of the current cache directory."""
+    global _CACHE_MANAGER
+
+    from ._settings import settings
+
+    cache_dir = Path(settings.cache_dir)
+    policy = os.environ.get("LAMIN_CACHE_EVICTION_POLICY", "lru").lower()
+    if policy not in EVICTION_POLICIES:
+        raise ValueError(
+            f"LAMIN_CACHE_EVICTION_POLICY should be one of {EVICTION_POLICIES}."
+        )
+    with _CACHE_MANAGER_LOCK:
+        if (
+            _CACHE_MANAGER is None
+            or _CACHE_MANAGER.cache_dir != cache_dir
+            or not _CACHE_MANAGER.path.exists()
+        ):
+            if _CACHE_MANAGER is not None:
+                _CACHE_MANAGER.close()
+            _CACHE_MANAGER = CacheManager(cache_dir, policy=policy)  # type: ignore
+        _CACHE_MANAGER.max_size = settings.cache_max_size
+        _CACHE_MANAGER.policy = policy  # type: ignore
+        return _CACHE_MANAGER
+
+
+def close_cache_manager() -> None:
+    global _CACHE_MANAGER
+
+    with _CACHE_MANAGER_LOCK:
+        if _CACHE_MANAGER is not None:
+            _CACHE_MANAGER.close()
+            _CACHE_MANAGER = None
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Iterable
+
+HASH_CACHE_FILENAME = ".hash_cache.sqlite"
+# each entry takes ~100 bytes, so the cache file stays below ~100 MB
+MAX_ENTRIES = 1_000_000
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS hashes (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    hash_type TEXT NOT NULL,
+    accessed INTEGER NOT NULL,
+    PRIMARY KEY (device, inode, size, mtime_ns, chunk_size)
+) WITHOUT ROWID
+"""
+_CREATE_INDEX = "CREATE INDEX IF NOT EXISTS hashes_accessed ON hashes (accessed)"
+
+# (device, inode, size, mtime_ns, chunk_size)
+StatKey = tuple[int, int, int, int, int]
+
+
+def stat_key(stat: os.stat_result, chunk_size: int | None) -> StatKey:
+    # chunk_size changes the hashing strategy, so it is a part of the key
+    return (
+        stat.st_dev,
+        stat.st_ino,
+        stat.st_size,
+        stat.st_mtime_ns,
+        0 if chunk_size is None else chunk_size,
+    )
+
+
+class HashCache:
+    """On-disk LRU cache of file hashes keyed by the stat signature of a file.
+
+    A file is re-hashed only if its device, inode, size or modification time changed.
+    """
+
+    def __init__(self, path: Path, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # the lock above serializes access from different threads
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute(_CREATE_TABLE)
+            self._conn.execute(_CREATE_INDEX)
+            # an upper bound of the number of entries, replaced entries are counted
+            # twice and the entries of other processes are counted on a recount
+            self._n_entries = self._conn.execute(
+                "SELECT COUNT(*) FROM hashes"
+            ).fetchone()[0]
+
+    def get_many(self, keys: Iterable[StatKey]) -> dict[StatKey, tuple[str, str]]:
+        """Look up hashes, returns only the keys that are present in the cache."""
+        keys = list(keys)
+        found: dict[StatKey, tuple[str, str]] = {}
+        if not keys:
+            return found
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            for key in keys:
+                row = cursor.execute(
+                    "SELECT hash, hash_type FROM hashes WHERE device = ? AND inode = ?"
+                    " AND size = ? AND mtime_ns = ? AND chunk_size = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    found[key] = row
+            if found:
+                now = time.time_ns()
+                cursor.executemany(
+                    "UPDATE hashes SET accessed = ? WHERE device = ? AND inode = ?"
+                    " AND size = ? AND mtime_ns = ? AND chunk_size = ?",
+                    ((now, *key) for key in found),
+                )
+        return found
+
+    def get(self, key: StatKey) -> tuple[str, str] | None:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, entries: Iterable[tuple[StatKey, str, str]]) -> None:
+        """Store `(key, hash, hash_type)` entries and evict least recently used ones."""
+        now = time.time_ns()
+        rows = [(*key, hash, hash_type, now) for key, hash, hash_type in entries]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._n_entries += len(rows)
+            if self._n_entries <= self.max_entries:
+                return
+            n_entries = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+            n_excess = n_entries - self.max_entries
+            if n_excess > 0:
+                # evict a tenth more so that the next puts don't recount
+                n_excess += self.max_entries // 10
+                n_entries -= self._conn.execute(
+                    "DELETE FROM hashes WHERE (device, inode, size, mtime_ns, chunk_size)"
+                    " IN (SELECT device, inode, size, mtime_ns, chunk_size FROM hashes"
+                    " ORDER BY accessed LIMIT ?)",
+                    (n_excess,),
+                ).rowcount
+            self._n_entries = n_entries
+
+    def put(self, key: StatKey, hash: str, hash_type: str) -> None:
+        self.put_many([(key, hash, hash_type)])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_HASH_CACHE: HashCache | None = None
+_HASH_CACHE_LOCK = threading.Lock()
+
+
+def get_hash_cache() -> HashCache:
+    """The hash cache in the current cache directory."""
+    global _HASH_CACHE
+
+    from ._settings import settings
+
+    path = Path(settings.cache_dir) / HASH_CACHE_FILENAME
+    with _HASH_CACHE_LOCK:
+        if _HASH_CACHE is None or _HASH_CACHE.path != path or not path.exists():
+            if _HASH_CACHE is not None:
+                _HASH_CACHE.close()
+            _HASH_CACHE = HashCache(path)
+        return _HASH_CACHE
+
+
+def close_hash_cache() -> None:
+    global _HASH_CACHE
+
+    with _HASH_CACHE_LOCK:
+        if _HASH_CACHE is not None:
+            _HASH_CACHE.close()
+            _HASH_CACHE = None
@@ -0,0 +1,274 @@
+"""Concurrent download of a single file in byte ranges on any fsspec filesystem.
+
+The parts are fetched with `cat_file(path, start, end)`, concurrently on the event
+loop of async filesystems (s3, gcs, http) or in threads otherwise, and written with
+`os.pwrite` at their offsets into a preallocated local file. The completed parts are
+recorded, so that an interrupted download resumes if the source didn't change.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from fsspec.callbacks import DEFAULT_CALLBACK
+
+from .hashing import MiB
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from fsspec.callbacks import Callback
+    from fsspec.spec import AbstractFileSystem
+
+DEFAULT_PART_SIZE = 32 * MiB
+DEFAULT_MAX_CONCURRENCY = 8
+# smaller files are downloaded as one stream
+RANGED_DOWNLOAD_MIN_SIZE = 2 * DEFAULT_PART_SIZE
+
+# the completed ranges of a partial download are recorded in this file next to it
+STATE_SUFFIX = ".state.json"
+
+_WRITE_LOCK = threading.Lock()
+
+
+def part_ranges(size: int, part_size: int) -> list[tuple[int, int]]:
+    """The `(start, end)` byte ranges of the parts of a file, `end` is exclusive."""
+    return [
+        (start, min(start + part_size, size)) for start in range(0, size, part_size)
+    ]
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    if hasattr(os, "pwrite"):
+        while view:
+            n_written = os.pwrite(fd, view, offset)
+            view = view[n_written:]
+            offset += n_written
+    else:  # windows
+        with _WRITE_LOCK:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while view:
+                view = view[os.write(fd, view) :]
+
+
+class RangeNotSupportedError(OSError):
+    """A byte-range request returned a different number of bytes."""
+
+
+def _check_part(data: bytes, start: int, end: int, rpath: str) -> None:
+    # a server that ignores the range header returns the whole file
+    if len(data) != end - start:
+        raise RangeNotSupportedError(
+            f"expected {end - start} bytes of {rpath} at offset {start},"
+            f" got {len(data)} bytes"
+        )
+
+
+def _merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class DownloadState:
+    """The completed byte ranges of a partial download in a file next to it.
+
+    A download can be resumed if the ETag and the size of the source match.
+    """
+
+    def __init__(self, lpath: str, etag: str | None, size: int):
+        self.path = Path(lpath + STATE_SUFFIX)
+        self.etag = etag
+        self.size = size
+        self.completed: list[tuple[int, int]] = []
+        self._lock = threading.Lock()
+
+    def load(self) -> list[tuple[int, int]]:
+        """The completed ranges of a previous attempt to download the same source."""
+        if self.etag is None or not self.path.exists():
+            return []
+        try:
+            state = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return []
+        if state.get("etag") != self.etag or state.get("size") != self.size:
+            return []
+        self.completed = _merge_ranges([tuple(part) for part in state["completed"]])
+        return self.completed
+
+    def add(self, start: int, end: int) -> None:
+        if self.etag is None:
+            return
+        with self._lock:
+            self.completed = _merge_ranges([*self.completed, (start, end)])
+            state = {"etag": self.etag, "size": self.size, "completed": self.completed}
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_text(json.dumps(state))
+            tmp_path.replace(self.path)
+
+    def is_completed(self, start: int, end: int) -> bool:
+        return any(
+            start >= done_start and end <= done_end
+            for done_start, done_end in self.completed
+        )
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+async def _download_parts_async(
+    fs: AbstractFileSystem,
+    rpath: str,
+    ranges: list[tuple[int, int]],
+    max_concurrency: int,
+    write_part: Callable[[bytes, int, int], None],
+    **kwargs,
+) -> None:
+    semaphore = asyncio.Semaphore(max_concurrency)
+    writes: list[asyncio.Future] = []
+
+    async def download_part(start: int, end: int) -> None:
+        async with semaphore:
+            data = await fs._cat_file(rpath, start=start, end=end, **kwargs)
+            _check_part(data, start, end, rpath)
+            write = asyncio.ensure_future(
+                asyncio.to_thread(write_part, data, start, end)
+            )
+            writes.append(write)
+            # a write can't be interrupted, it is awaited after a cancellation
+            await asyncio.shield(write)
+
+    tasks = [asyncio.ensure_future(download_part(*part)) for part in ranges]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*writes, return_exceptions=True)
+        raise
+
+
+def _download_parts_threaded(
+    fs: AbstractFileSystem,
+    rpath: str,
+    ranges: list[tuple[int, int]],
+    max_concurrency: int,
+    write_part: Callable[[bytes, int, int], None],
+    **kwargs,
+) -> None:
+    def download_part(start: int, end: int) -> None:
+        data = fs.cat_file(rpath, start=start, end=end, **kwargs)
+        _check_part(data, start, end, rpath)
+        write_part(data, start, end)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        # list raises the first exception
+        list(executor.map(lambda part: download_part(*part), ranges))
+
+
+def download_ranged(
+    fs: AbstractFileSystem,
+    rpath: str,
+    lpath: str,
+    size: int,
+    part_size: int | None = None,
+    max_concurrency: int | None = None,
+    callback: Callback = DEFAULT_CALLBACK,
+    etag: str | None = None,
+    **kwargs,
+) -> None:
+    """Download a file in concurrent byte-range requests.
+
+    If `etag` is passed, the completed ranges are recorded next to `lpath` and
+    an interrupted download of the same source resumes from them.
+
+    The first part is downloaded alone to check that the server supports byte
+    ranges. If a part has a wrong length, `RangeNotSupportedError` is raised and
+    the partial file is removed, the caller should download the file as a stream.
+
+    Args:
+        fs: The filesystem of the file.
+        rpath: The path of the file on `fs`.
+        lpath: The local path to download to.
+        size: The size of the file in bytes.
+        part_size: The size of the byte range of a request.
+        max_concurrency: The maximal number of concurrent requests.
+        callback: An fsspec callback, reports progress like `fs.download`.
+        etag: The ETag of the source, enables resuming.
+        **kwargs: Additional arguments for `fs.cat_file`, like `version_id`.
+    """
+    from fsspec.asyn import sync
+
+    max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+    state = DownloadState(lpath, etag, size)
+    completed = state.load() if Path(lpath).exists() else []
+    ranges = [
+        part
+        for part in part_ranges(size, part_size or DEFAULT_PART_SIZE)
+        if not state.is_completed(*part)
+    ]
+    # report progress like fs.download with one file
+    callback.set_size(1)
+    child = callback.branched(rpath, lpath)
+    child.set_size(size)
+    if completed:
+        child.relative_update(sum(end - start for start, end in completed))
+    flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    if not completed:
+        flags |= os.O_TRUNC
+    Path(lpath).parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lpath, flags, 0o666)
+    lock = threading.Lock()
+
+    def write_part(data: bytes, start: int, end: int) -> None:
+        _pwrite(fd, data, start)
+        state.add(start, end)
+        with lock:
+            child.relative_update(len(data))
+
+    def download_parts(parts: list[tuple[int, int]]) -> None:
+        if not parts:
+            return
+        if getattr(fs, "async_impl", False):
+            sync(
+                fs.loop,
+                _download_parts_async,
+                fs,
+                rpath,
+                parts,
+                max_concurrency,
+                write_part,
+                **kwargs,
+            )
+        else:
+            _download_parts_threaded(
+                fs, rpath, parts, max_concurrency, write_part, **kwargs
+            )
+
+    try:
+        os.ftruncate(fd, size)
+        # check the support of byte ranges before sending concurrent requests
+        download_parts(ranges[:1])
+        download_parts(ranges[1:])
+    except BaseException as e:
+        os.close(fd)
+        # keep a resumable partial file
+        if etag is None or isinstance(e, RangeNotSupportedError):
+            Path(lpath).unlink(missing_ok=True)
+            state.remove()
+        raise
+    os.close(fd)
+    state.remove()
+    callback.relative_update(1)
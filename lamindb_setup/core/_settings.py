@@ -12,6 +12,7 @@ from platformdirs import user_cache_dir
 
 from ._deprecated import deprecated
 from ._settings_load import (
+    load_cache_max_size_from_settings,
     load_cache_path_from_settings,
     load_instance_settings,
     load_or_create_user_settings,
@@ -81,6 +82,7 @@ class SetupSettings:
     _private_django_api_path: Path = settings_dir / "private_django_api"
 
     _cache_dir: Path | None = None
+    _cache_max_size: int | None = None
     modules_warning: str | None = None
 
     _branch = None  # do not have types here
@@ -415,6 +417,30 @@ class SetupSettings:
             )
         return cache_dir
 
+    @property
+    def cache_max_size(self) -> int | None:
+        """The maximal size of the cache directory in bytes, `None` means no limit.
+
+        The least recently used cached files are deleted if the cache grows larger,
+        also if another process still reads them and didn't pin them.
+        Set it with the `LAMIN_CACHE_MAX_SIZE` environment variable, for example
+        `LAMIN_CACHE_MAX_SIZE=50GB`, through `lamindb_cache_max_size` in the system
+        settings or by assigning this property.
+        """
+        from ._cache_manager import parse_size
+
+        if "LAMIN_CACHE_MAX_SIZE" in os.environ:
+            return parse_size(os.environ["LAMIN_CACHE_MAX_SIZE"])
+        if self._cache_max_size is None:
+            return parse_size(load_cache_max_size_from_settings())
+        return self._cache_max_size
+
+    @cache_max_size.setter
+    def cache_max_size(self, value: int | str | None):
+        from ._cache_manager import parse_size
+
+        self._cache_max_size = parse_size(value)
+
     @property
     def paths(self) -> type[SetupPaths]:
         """Convert cloud paths to lamindb local paths.
@@ -535,8 +561,26 @@ class SetupPaths:
         # cache_key is ignored in cloud_to_local_no_update if filepath is local
         local_filepath = SetupPaths.cloud_to_local_no_update(filepath, cache_key)
         if not isinstance(filepath, LocalPathClasses):
+            from ._cache_lock import lock_cache_entry
+            from ._cache_manager import get_cache_manager
+
             local_filepath.parent.mkdir(parents=True, exist_ok=True)
-            filepath.synchronize_to(local_filepath, **kwargs)  # type: ignore
+            if kwargs.get("just_check", False):
+                filepath.synchronize_to(local_filepath, **kwargs)  # type: ignore
+                return local_filepath
+            # concurrent processes wait for the first one to download and reuse it
+            while True:
+                with lock_cache_entry(local_filepath) as acquired:
+                    # the holder failed if there is no file, compete for the lock
+                    if not acquired and not local_filepath.exists():
+                        continue
+                    synchronized = acquired and filepath.synchronize_to(  # type: ignore
+                        local_filepath, **kwargs
+                    )
+                    cache_manager = get_cache_manager()
+                    cache_manager.record_access(local_filepath, downloaded=synchronized)
+                    cache_manager.enforce(keep=[local_filepath])
+                break
         return local_filepath
 
 
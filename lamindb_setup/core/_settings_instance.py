@@ -476,6 +476,13 @@ class InstanceSettings:
             sqlite_file = self._sqlite_file
             cache_file = self.storage.cloud_to_local_no_update(sqlite_file)
             sqlite_file.synchronize_to(cache_file, print_progress=True)  # type: ignore
+            self._pin_sqlite_file_local()
+
+    def _pin_sqlite_file_local(self) -> None:
+        # the open database must not be evicted from the cache
+        from ._cache_manager import get_cache_manager
+
+        get_cache_manager().pin(self._sqlite_file_local)
 
     def _check_sqlite_lock(self):
         from ._hub_client import call_with_fallback
@@ -520,6 +527,8 @@ class InstanceSettings:
             sqlite_filepath = self.storage.cloud_to_local(
                 self._sqlite_file, error_no_origin=False
             )
+            if self.storage.type_is_cloud:
+                self._pin_sqlite_file_local()
             return f"sqlite:///{sqlite_filepath.as_posix()}"
         else:
             return self._db
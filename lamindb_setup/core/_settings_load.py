@@ -48,6 +48,15 @@ def load_cache_path_from_settings(storage_settings: Path | None = None) -> Path
         return None
 
 
+def load_cache_max_size_from_settings() -> str | None:
+    """The cache size limit set by an admin in the system settings."""
+    system_settings = system_settings_file()
+    if system_settings.exists():
+        return dotenv_values(system_settings).get("lamindb_cache_max_size", None)
+    else:
+        return None
+
+
 def _instance_settings_file_from_identifier(identifier: str) -> Path | None:
     from lamindb_setup._connect_instance import get_owner_name_from_identifier
 
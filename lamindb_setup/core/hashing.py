@@ -12,18 +12,49 @@ from __future__ import annotations
 
 import base64
 import hashlib
+import heapq
 import json
-from concurrent.futures import ThreadPoolExecutor
-from typing import TYPE_CHECKING
+import math
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, BinaryIO, Literal
 
 import psutil
+from lamin_utils import logger
 
 HASH_LENGTH = 22
+# files larger than this are hashed from their first and last chunks
+DEFAULT_CHUNK_SIZE = 50 * 1024 * 1024
+# files are read in blocks of this size into reusable per-thread buffers
+BLOCK_SIZE = 1024 * 1024
+
+# small files are batched until a batch reads this many bytes or has this many files
+BATCH_BYTES = 64 * 1024 * 1024
+BATCH_MAX_FILES = 512
+
+MiB = 1024**2
+# s3fs uses 50 MiB parts by default, boto3 and the aws cli use 8 MiB parts
+S3_DEFAULT_PART_SIZE = 50 * MiB
+KNOWN_PART_SIZES = (8 * MiB, 16 * MiB, 5 * MiB, 64 * MiB, 100 * MiB)
+MAX_INFERRED_PART_SIZES = 16
+
+# memory budget for sorting hashes in hash_from_hashes_list, ~3M hashes
+HASHES_MAX_MEMORY = 256 * MiB
+
+_THREAD_LOCAL = threading.local()
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Callable, Iterable, Iterator
+    from concurrent.futures import Executor, Future
 
-    from lamindb_setup.types import AnyPathStr, Path
+    from lamindb_setup.types import AnyPathStr
 
 
 def hash_and_encode_as_b62(s: str) -> str:
@@ -53,25 +84,97 @@ def hash_dict(d: dict) -> str:
     ]
 
 
-def hash_from_hashes_list(hashes: Iterable[str]) -> str:
+def _sorted_external(items: Iterable[str], max_memory: int) -> Iterator[str]:
+    """Sort strings without newlines, spills sorted runs to disk above `max_memory`."""
+    run: list[str] = []
+    run_memory = 0
+    run_files: list[IO[str]] = []
+    try:
+        for item in items:
+            run.append(item)
+            # the string object and the pointer in the list
+            run_memory += sys.getsizeof(item) + 8
+            if run_memory >= max_memory:
+                run.sort()
+                run_file = tempfile.TemporaryFile("w+", encoding="utf-8", newline="\n")
+                run_file.writelines(f"{item}\n" for item in run)
+                run_file.seek(0)
+                run_files.append(run_file)
+                run, run_memory = [], 0
+        run.sort()
+        if not run_files:
+            yield from run
+            return
+        runs = [(line[:-1] for line in run_file) for run_file in run_files]
+        yield from heapq.merge(*runs, run)
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+
+def hash_from_hashes_list(
+    hashes: Iterable[str], max_memory: int = HASHES_MAX_MEMORY
+) -> str:
+    """Hash a list of hashes independent of their order.
+
+    The hashes are consumed as a stream. If they take more than `max_memory` bytes,
+    sorted runs are spilled to temporary files and merged.
+    """
     # need to sort below because we don't want the order of parsing the dir to
     # affect the hash
-    digests = b"".join(
-        hashlib.md5(hash.encode("utf-8")).digest() for hash in sorted(hashes)
-    )
-    digest = hashlib.md5(digests).digest()
-    return to_b64_str(digest)[:HASH_LENGTH]
+    hasher = hashlib.md5()
+    for hash in _sorted_external(hashes, max_memory):
+        hasher.update(hashlib.md5(hash.encode("utf-8")).digest())
+    return to_b64_str(hasher.digest())[:HASH_LENGTH]
+
+
+def _get_buffer() -> memoryview:
+    # every thread reuses its own preallocated buffer across files
+    buffer = getattr(_THREAD_LOCAL, "buffer", None)
+    if buffer is None:
+        buffer = _THREAD_LOCAL.buffer = memoryview(bytearray(BLOCK_SIZE))
+    return buffer
+
+
+def _update_from_file(hasher, fp: BinaryIO, n_bytes: int | None = None) -> int:
+    """Feed at most `n_bytes` (all if `None`) from `fp` into `hasher` block by block."""
+    buffer = _get_buffer()
+    n_total = 0
+    while n_bytes is None or n_total < n_bytes:
+        if n_bytes is None or n_bytes - n_total >= BLOCK_SIZE:
+            n_read = fp.readinto(buffer)
+        else:
+            n_read = fp.readinto(buffer[: n_bytes - n_total])
+        if not n_read:
+            break
+        hasher.update(buffer[:n_read])
+        n_total += n_read
+    return n_total
 
 
 # below is only used when comparing with git's sha1 hashes
 # we don't use it for our own hashes
 def hash_code(file_path: AnyPathStr) -> hashlib._Hash:
-    with open(file_path, "rb") as fp:
-        data = fp.read()
-    data_size = len(data)
-    header = f"blob {data_size}\0".encode()
-    blob = header + data
-    return hashlib.sha1(blob)
+    # stream the file after the header instead of concatenating it in memory
+    with open(file_path, "rb", buffering=0) as fp:
+        data_size = os.fstat(fp.fileno()).st_size
+        hasher = hashlib.sha1(f"blob {data_size}\0".encode())
+        n_read = _update_from_file(hasher, fp, data_size)
+    if n_read != data_size:
+        raise RuntimeError(f"{file_path} changed while hashing.")
+    return hasher
+
+
+def hash_codes(
+    file_paths: Iterable[AnyPathStr], n_workers: int | None = None
+) -> list[hashlib._Hash]:
+    """Compute git blob sha1 hashes of many files concurrently, in input order."""
+    file_paths = list(file_paths)
+    n_workers = min(n_workers or _n_workers(), len(file_paths))
+    if n_workers > 1:
+        with ThreadPoolExecutor(n_workers) as pool:
+            return list(pool.map(hash_code, file_paths))
+    return [hash_code(file_path) for file_path in file_paths]
 
 
 def hash_small_bytes(data: bytes) -> str:
@@ -87,48 +190,327 @@ def hash_string(string: str) -> str:
 def hash_file(
     file_path: Path,
     file_size: int | None = None,
-    chunk_size: int | None = 50 * 1024 * 1024,
+    chunk_size: int | None = DEFAULT_CHUNK_SIZE,
+    use_cache: bool = False,
+    use_mmap: bool = False,
 ) -> tuple[int, str, str]:
-    with open(file_path, "rb") as fp:
+    """Compute the size, hash and hash type of a file.
+
+    Args:
+        file_path: A local file path.
+        file_size: The size of the file, inferred if not passed.
+        chunk_size: Files larger than this are hashed from their first and last chunk.
+            If `None`, the whole file is hashed.
+        use_cache: Look up the hash in the persistent hash cache of the cache directory
+            and store it there after computing.
+            The cache is keyed by device, inode, size and modification time of the file.
+        use_mmap: Hash the memory-mapped file instead of reading it into a buffer.
+    """
+    if use_cache:
+        from ._hash_cache import get_hash_cache, stat_key
+
+        key = stat_key(Path(file_path).stat(), chunk_size)
+        hash_cache = get_hash_cache()
+        if (cached := hash_cache.get(key)) is not None:
+            return key[2], *cached
+        file_size, hash, hash_type = hash_file(
+            file_path, key[2], chunk_size, use_mmap=use_mmap
+        )
+        hash_cache.put(key, hash, hash_type)
+        return file_size, hash, hash_type
+
+    with open(file_path, "rb", buffering=0) as fp:
         if file_size is None:
             fp.seek(0, 2)
             file_size = fp.tell()
             fp.seek(0, 0)
         if chunk_size is None:
             chunk_size = file_size
-        first_chunk = fp.read(chunk_size)
-        if file_size <= chunk_size:
-            digest = hashlib.md5(first_chunk).digest()
-            hash_type = "md5"
+        if use_mmap and file_size > 0:
+            digest, hash_type = _digest_mmap(fp, file_size, chunk_size)
+        elif file_size <= chunk_size:
+            hasher = hashlib.md5()
+            _update_from_file(hasher, fp, chunk_size)
+            digest, hash_type = hasher.digest(), "md5"
         else:
+            first_hasher, last_hasher = hashlib.sha1(), hashlib.sha1()
+            _update_from_file(first_hasher, fp, chunk_size)
             fp.seek(-chunk_size, 2)
-            last_chunk = fp.read(chunk_size)
-            digest = hashlib.sha1(
-                hashlib.sha1(first_chunk).digest() + hashlib.sha1(last_chunk).digest()
-            ).digest()
+            _update_from_file(last_hasher, fp, chunk_size)
+            digest = hashlib.sha1(first_hasher.digest() + last_hasher.digest()).digest()
             hash_type = "sha1-fl"
     return file_size, to_b64_str(digest)[:HASH_LENGTH], hash_type
 
 
-def hash_dir(path: Path) -> tuple[int, str, str, int]:
-    files = (subpath for subpath in path.rglob("*") if subpath.is_file())
+def _digest_mmap(fp: BinaryIO, file_size: int, chunk_size: int) -> tuple[bytes, str]:
+    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        # the view has to be released before the map is closed
+        with memoryview(mapped) as view:
+            if file_size <= chunk_size:
+                return hashlib.md5(view[:chunk_size]).digest(), "md5"
+            first_digest = hashlib.sha1(view[:chunk_size]).digest()
+            last_digest = hashlib.sha1(view[-chunk_size:]).digest()
+    return hashlib.sha1(first_digest + last_digest).digest(), "sha1-fl"
+
+
+def s3_multipart_part_size(file_size: int) -> int:
+    """The part size that :meth:`~lamindb.UPath.upload_from` uses for s3 uploads."""
+    # s3 allows at most 10k parts per upload
+    if file_size / S3_DEFAULT_PART_SIZE > 10000:
+        step = 5 * MiB
+        return math.ceil(math.ceil(file_size / 10000) / step) * step
+    return S3_DEFAULT_PART_SIZE
+
+
+def infer_multipart_part_sizes(file_size: int, n_parts: int) -> list[int]:
+    """Candidate part sizes of a multipart upload with `n_parts` parts, likeliest first.
+
+    Starts with the part sizes of `upload_from`, `boto3` and the aws cli and adds
+    the part sizes in whole MiB that are compatible with `file_size` and `n_parts`.
+    """
+    if n_parts < 1 or file_size < n_parts:
+        return []
+    candidates = [s3_multipart_part_size(file_size), *KNOWN_PART_SIZES]
+    # the smallest part size for which the file fits into n_parts parts
+    min_part_size = math.ceil(file_size / n_parts)
+    min_mib = math.ceil(min_part_size / MiB)
+    candidates += [
+        mib * MiB for mib in range(min_mib, min_mib + MAX_INFERRED_PART_SIZES)
+    ]
+    part_sizes: list[int] = []
+    for part_size in candidates:
+        if part_size not in part_sizes and math.ceil(file_size / part_size) == n_parts:
+            part_sizes.append(part_size)
+    return part_sizes
 
-    def hash_size(file):
-        size, hash, _ = hash_file(file)
-        return hash, size
 
-    try:
-        n_workers = len(psutil.Process().cpu_affinity())
-    except AttributeError:
-        n_workers = psutil.cpu_count()
+def _hash_part(file_path: AnyPathStr, offset: int, part_size: int) -> bytes:
+    hasher = hashlib.md5()
+    with open(file_path, "rb", buffering=0) as fp:
+        fp.seek(offset)
+        _update_from_file(hasher, fp, part_size)
+    return hasher.digest()
+
+
+def hash_multipart(
+    file_path: AnyPathStr, part_size: int, n_workers: int | None = None
+) -> tuple[int, str, str]:
+    """Compute the hash of an s3 multipart upload with the given part size.
+
+    Parts are hashed in parallel. The result can be compared with
+    the hash of :func:`~lamindb_setup.core.upath.get_stat_file_cloud` for s3 objects.
+    A multipart upload with a single part is hashed like the others, the md5 of its
+    part md5, whereas a plain upload has the plain md5 of the file.
+
+    Returns:
+        The size, hash and hash type `md5-{number of parts}`.
+    """
+    file_size = Path(file_path).stat().st_size
+    n_parts = max(1, math.ceil(file_size / part_size))
+    offsets = range(0, max(file_size, 1), part_size)
+    n_workers = min(n_workers or _n_workers(), n_parts)
     if n_workers > 1:
         with ThreadPoolExecutor(n_workers) as pool:
-            hashes_sizes = pool.map(hash_size, files)
+            digests = list(
+                pool.map(
+                    lambda offset: _hash_part(file_path, offset, part_size), offsets
+                )
+            )
     else:
-        hashes_sizes = map(hash_size, files)
-    hashes, sizes = zip(*hashes_sizes, strict=False)
-
-    hash, hash_type = hash_from_hashes_list(hashes), "md5-d"
-    n_files = len(hashes)
-    size = sum(sizes)
+        digests = [_hash_part(file_path, offset, part_size) for offset in offsets]
+    digest = hashlib.md5(b"".join(digests)).digest()
+    return file_size, to_b64_str(digest)[:HASH_LENGTH], f"md5-{n_parts}"
+
+
+def validate_multipart_hash(
+    file_path: AnyPathStr,
+    hash: str,
+    hash_type: str,
+    part_sizes: Iterable[int] | None = None,
+    n_workers: int | None = None,
+) -> int | None:
+    """Check a local file against the hash of an s3 object without downloading it.
+
+    Args:
+        file_path: A local file path.
+        hash: The hash of the s3 object from `get_stat_file_cloud`.
+        hash_type: The hash type of the s3 object, `md5` or `md5-{number of parts}`.
+        part_sizes: The part sizes to try, inferred if not passed.
+        n_workers: The number of threads to hash the parts.
+
+    Returns:
+        The matching part size or `None` if the file doesn't match.
+    """
+    file_size = Path(file_path).stat().st_size
+    if hash_type == "md5":
+        digest = _hash_part(file_path, 0, file_size)
+        return file_size if to_b64_str(digest)[:HASH_LENGTH] == hash else None
+    if not hash_type.startswith("md5-") or not hash_type[4:].isdigit():
+        raise ValueError(f"hash_type {hash_type} is not an s3 multipart hash type.")
+    n_parts = int(hash_type[4:])
+    if part_sizes is None:
+        part_sizes = infer_multipart_part_sizes(file_size, n_parts)
+    for part_size in part_sizes:
+        if math.ceil(file_size / part_size) != n_parts:
+            continue
+        _, local_hash, _ = hash_multipart(file_path, part_size, n_workers)
+        if local_hash == hash:
+            return part_size
+    return None
+
+
+def _n_workers() -> int:
+    try:
+        return len(psutil.Process().cpu_affinity())
+    except AttributeError:
+        return psutil.cpu_count()
+
+
+def _walk_files(path: str) -> Iterator[tuple[str, os.stat_result]]:
+    # same as rglob: doesn't descend into symlinked directories but follows
+    # symlinked files, the stat results are cached by os.scandir where possible
+    directories = [path]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path, entry.stat()
+
+
+def _batch_files(
+    files: Iterable[tuple[str, os.stat_result]],
+) -> Iterator[list[tuple[str, os.stat_result]]]:
+    # group small files to amortize the per-task overhead, large files end up alone
+    batch: list[tuple[str, os.stat_result]] = []
+    batch_bytes = 0
+    for file, stat in files:
+        batch.append((file, stat))
+        batch_bytes += min(stat.st_size, 2 * DEFAULT_CHUNK_SIZE)
+        if batch_bytes >= BATCH_BYTES or len(batch) >= BATCH_MAX_FILES:
+            yield batch
+            batch, batch_bytes = [], 0
+    if batch:
+        yield batch
+
+
+def _hash_batch(batch: list[tuple[str, os.stat_result]]) -> list[tuple[str, str]]:
+    # module-level to be picklable for process workers
+    return [hash_file(file, stat.st_size)[1:] for file, stat in batch]
+
+
+def _map_bounded(
+    executor: Executor | None,
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    n_workers: int = 1,
+) -> Iterator[tuple[Any, Any]]:
+    """Yield `(item, func(item))`, submits at most 2 tasks per worker ahead of time."""
+    if executor is None:
+        for item in items:
+            yield item, func(item)
+        return
+    max_pending = 2 * n_workers
+    pending: deque[tuple[Any, Future]] = deque()
+    for item in items:
+        if len(pending) >= max_pending:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
+        pending.append((item, executor.submit(func, item)))
+    while pending:
+        done_item, future = pending.popleft()
+        yield done_item, future.result()
+
+
+def hash_dir(
+    path: Path,
+    use_cache: bool = False,
+    *,
+    n_workers: int | None = None,
+    executor: Literal["thread", "process"] = "thread",
+) -> tuple[int, str, str, int]:
+    """Compute the size, hash, hash type and number of files of a directory.
+
+    The directory is walked with `os.scandir` and small files are hashed in batches
+    that are passed to the workers through a bounded queue.
+    Throughput is logged on the debug level.
+
+    Args:
+        path: A local directory path.
+        use_cache: Only re-hash files whose stat signature changed since they were
+            hashed last time, see :func:`hash_file`.
+        n_workers: The number of workers, defaults to the number of available CPUs.
+        executor: Hash in worker threads or in worker processes.
+    """
+    start_time = time.perf_counter()
+
+    if n_workers is None:
+        n_workers = _n_workers()
+
+    hash_cache = None
+    if use_cache:
+        from ._hash_cache import get_hash_cache, stat_key
+
+        hash_cache = get_hash_cache()
+
+    # the hashes are streamed into hash_from_hashes_list instead of being collected
+    cached_hashes: list[str] = []
+    size = 0
+    n_files = 0
+
+    def batches_to_hash() -> Iterator[list[tuple[str, os.stat_result]]]:
+        nonlocal size
+        for batch in _batch_files(_walk_files(os.fspath(path))):
+            size += sum(stat.st_size for _, stat in batch)
+            if hash_cache is not None:
+                keys = [stat_key(stat, DEFAULT_CHUNK_SIZE) for _, stat in batch]
+                cached = hash_cache.get_many(keys)
+                if cached:
+                    cached_hashes.extend(hash for hash, _ in cached.values())
+                    batch = [
+                        file_stat
+                        for file_stat, key in zip(batch, keys, strict=True)
+                        if key not in cached
+                    ]
+            if batch:
+                yield batch
+
+    def hashes() -> Iterator[str]:
+        nonlocal n_files
+        pool: Executor | None = None
+        if n_workers > 1:
+            if executor == "process":
+                pool = ProcessPoolExecutor(n_workers)
+            else:
+                pool = ThreadPoolExecutor(n_workers)
+        try:
+            for batch, hashes_types in _map_bounded(
+                pool, _hash_batch, batches_to_hash(), n_workers
+            ):
+                if hash_cache is not None:
+                    hash_cache.put_many(
+                        (stat_key(stat, DEFAULT_CHUNK_SIZE), hash, hash_type)
+                        for (_, stat), (hash, hash_type) in zip(
+                            batch, hashes_types, strict=True
+                        )
+                    )
+                n_files += len(hashes_types)
+                yield from (hash for hash, _ in hashes_types)
+                n_files += len(cached_hashes)
+                yield from cached_hashes
+                cached_hashes.clear()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        n_files += len(cached_hashes)
+        yield from cached_hashes
+
+    hash, hash_type = hash_from_hashes_list(hashes()), "md5-d"
+
+    duration = max(time.perf_counter() - start_time, 1e-9)
+    logger.debug(
+        f"hashed {n_files} files ({size / 1024**2:.1f} MiB) in {duration:.2f}s:"
+        f" {n_files / duration:.0f} files/s, {size / 1024**2 / duration:.1f} MiB/s"
+    )
     return size, hash, hash_type, n_files
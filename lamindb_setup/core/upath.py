@@ -7,7 +7,6 @@
 from __future__ import annotations
 
 import builtins
-import math
 import os
 import re
 import time
@@ -30,9 +29,24 @@ from lamindb_setup.errors import StorageNotEmpty
 
 from ._asyncio_write_spin import repair_spurious_write_errors
 from ._aws_options import HOSTED_BUCKETS, get_user_aws_options_manager
+from ._cache_lock import partial_path
+from ._cache_manager import IndexedStat, get_cache_manager
 from ._deprecated import deprecated
+from ._ranged_download import (
+    RANGED_DOWNLOAD_MIN_SIZE,
+    STATE_SUFFIX,
+    RangeNotSupportedError,
+    download_ranged,
+)
 from .canonical_suffix import CanonicalSuffix
-from .hashing import HASH_LENGTH, b16_to_b64, hash_from_hashes_list, hash_string
+from .hashing import (
+    HASH_LENGTH,
+    S3_DEFAULT_PART_SIZE,
+    b16_to_b64,
+    hash_from_hashes_list,
+    hash_string,
+    s3_multipart_part_size,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -44,6 +58,8 @@ if TYPE_CHECKING:
 
     from lamindb_setup.types import AnyPath, AnyPathStr
 
+    from ._cache_manager import CacheManager
+
 LocalPathClasses = (PosixPath, WindowsPath, LocalPath)
 
 
@@ -354,15 +370,25 @@ def download_to(
     local_path: AnyPathStr,
     print_progress: bool = True,
     use_boto3: bool = False,
+    part_size: int | None = None,
+    max_concurrency: int | None = None,
     **kwargs,
 ):
     """Download from self (a destination in the cloud) to the local path.
 
+    Single files larger than two parts are downloaded in concurrent byte-range
+    requests on all filesystems. Such a download resumes after an interruption
+    if the ETag of the source didn't change.
+
     Args:
         local_path: A local path to download to.
         print_progress: Print progress.
         use_boto3: Use boto3 instead of s3fs to download a single file from s3.
             Ignored if the path is not a file or not in s3
+        part_size: The size of a byte range of a single file download,
+            defaults to 32 MiB.
+        max_concurrency: The maximal number of concurrent byte-range requests,
+            defaults to 8.
         **kwargs: Additional arguments for the download.
     """
     fs = self.fs
@@ -416,6 +442,39 @@ def download_to(
 
     cloud_path_str = str(self)
 
+    stat_info = kwargs.pop("stat_info", None)
+    if stat_info is None:
+        stat_info = self.stat().as_info()
+    size = stat_info.get("size")
+    min_size = RANGED_DOWNLOAD_MIN_SIZE if part_size is None else 2 * part_size
+    # recursive is meaningless for a single file, other arguments are specific
+    # to fs.download and require it
+    cat_kwargs = {key: value for key, value in kwargs.items() if key != "recursive"}
+    callback = cat_kwargs.pop("callback", fsspec.callbacks.DEFAULT_CALLBACK)
+    if (
+        stat_info["type"] == "file"
+        and size is not None
+        and size >= min_size
+        and not Path(local_path_str).is_dir()
+        and set(cat_kwargs) <= {"version_id"}
+    ):
+        try:
+            download_ranged(
+                fs,
+                fs._strip_protocol(cloud_path_str),
+                local_path_str,
+                size,
+                part_size=part_size,
+                max_concurrency=max_concurrency,
+                callback=callback,
+                # an interrupted download resumes if the etag didn't change
+                etag=_get_etag(stat_info),
+                **cat_kwargs,
+            )
+            return
+        except RangeNotSupportedError as e:
+            logger.debug(f"downloading {cloud_path_str} as a stream: {e}")
+
     if "recursive" not in kwargs:
         kwargs["recursive"] = True
 
@@ -423,7 +482,7 @@ def download_to(
     # otherwise fsspec calls fs._ls_real where it reads the body and parses links
     # so the file is downloaded 2 times
     # upath doesn't call fs.ls to infer type, so it is safe to call
-    if protocol in {"http", "https"} and self.stat().as_info()["type"] == "file":
+    if protocol in {"http", "https"} and stat_info["type"] == "file":
         self.fs.use_listings_cache = True
         self.fs.dircache[cloud_path_str] = []
 
@@ -494,14 +553,10 @@ def upload_from(
                 destination += "/"
             cleanup_cache = True
     elif protocol == "s3" and "chunksize" not in kwargs:
-        size = local_path.stat().st_size
-        MiB = 1024**2
-        DEFAULT_CHUNKSIZE = 50 * MiB  # so in s3fs
-        if size / DEFAULT_CHUNKSIZE > 10000:  # should be no more than 10k parts for s3
-            raw = math.ceil(size / 10000)
-            step = 5 * MiB
-            rounded = math.ceil(raw / step) * step
-            kwargs["chunksize"] = rounded
+        # the part size is needed to validate the multipart hash, see hash_multipart
+        chunksize = s3_multipart_part_size(local_path.stat().st_size)
+        if chunksize != S3_DEFAULT_PART_SIZE:  # the s3fs default
+            kwargs["chunksize"] = chunksize
 
     self.fs.upload(source, destination, recursive=create_folder, **kwargs)
 
@@ -516,6 +571,24 @@ def upload_from(
         return self
 
 
+def _get_cache_index(destination: Path) -> CacheManager | None:
+    from ._settings import settings
+
+    if not destination.is_relative_to(Path(settings.cache_dir).resolve()):
+        return None
+    return get_cache_manager()
+
+
+def _get_etag(stat: dict) -> str | None:
+    etag = stat.get("ETag", stat.get("etag"))
+    return None if etag is None else str(etag).strip('"')
+
+
+def _etag_changed(local_stat: os.stat_result | IndexedStat, etag: str | None) -> bool:
+    indexed_etag = getattr(local_stat, "etag", None)
+    return indexed_etag is not None and etag is not None and indexed_etag != etag
+
+
 def synchronize_to(
     origin: UPath,
     destination: Path,
@@ -577,13 +650,16 @@ def synchronize_to(
 
     local_paths: list[Path] = []
     cloud_stats: dict[str, int]
+    cloud_etags: dict[str, str | None] = {}
+    # the files of cached directories are indexed to avoid scanning them
+    cache_index = _get_cache_index(destination) if is_dir else None
     if is_dir:
-        cloud_stats = {
-            file: get_modified(stat)
-            for file, stat in origin.fs.find(
-                origin_str, detail=True, **stat_kwargs
-            ).items()
-        }
+        cloud_stats = {}
+        for file, stat in origin.fs.find(
+            origin_str, detail=True, **stat_kwargs
+        ).items():
+            cloud_stats[file] = get_modified(stat)
+            cloud_etags[file] = _get_etag(stat)
         for cloud_path in cloud_stats:
             file_key = PurePosixPath(cloud_path).relative_to(origin.path).as_posix()
             local_paths.append(destination / file_key)
@@ -591,12 +667,44 @@ def synchronize_to(
         cloud_stats = {origin.path: get_modified(cloud_info)}
         local_paths.append(destination)
 
-    local_paths_all: dict[Path, os.stat_result] = {}
-    if destination.exists():
+    local_paths_all: dict[Path, os.stat_result | IndexedStat] = {}
+    destination_exists = destination.exists()
+    if destination_exists:
         if is_dir:
-            local_paths_all = {
-                path: path.stat() for path in destination.rglob("*") if path.is_file()
-            }
+            indexed = None
+            if cache_index is not None:
+                indexed = cache_index.indexed_files(destination)
+            if indexed is not None:
+                # a file can be deleted locally without updating the index, only
+                # the files in folders that changed since indexing are checked
+                changed = cache_index.changed_folders(destination)  # type: ignore[union-attr]
+                missing = set()
+                if changed:
+                    missing = {
+                        path
+                        for path in indexed
+                        if path.parent in changed and not path.exists()
+                    }
+                    cache_index.remove_files(missing)  # type: ignore[union-attr]
+                    cache_index.record_folders(changed)  # type: ignore[union-attr]
+                local_paths_all = {
+                    path: stat for path, stat in indexed.items() if path not in missing
+                }
+            else:
+                local_paths_all = {
+                    path: path.stat()
+                    for path in destination.rglob("*")
+                    if path.is_file()
+                }
+                if cache_index is not None:
+                    cache_index.index_files(
+                        destination,
+                        {
+                            path: IndexedStat(stat.st_size, stat.st_mtime)
+                            for path, stat in local_paths_all.items()
+                        },
+                        replace=True,
+                    )
             if not use_size:
                 # cast to int to remove the fractional parts
                 # there is a problem when a fractional part is allowed on one filesystem
@@ -610,7 +718,18 @@ def synchronize_to(
                         default=0,
                     )
                 )
-                if local_mts_max > cloud_mts_max:
+                # an overwrite within the same second only changes the etag
+                etag_changed = any(
+                    _etag_changed(local_stat, cloud_etags.get(cloud_file))
+                    for cloud_file, local_path in zip(
+                        cloud_stats, local_paths, strict=True
+                    )
+                    if (local_stat := local_paths_all.get(local_path)) is not None
+                )
+                if etag_changed:
+                    if just_check:
+                        return True
+                elif local_mts_max > cloud_mts_max:
                     return False
                 elif local_mts_max == cloud_mts_max:
                     if len(local_paths_all) == len(cloud_stats):
@@ -624,8 +743,12 @@ def synchronize_to(
         local_files_sync = []
         for i, (cloud_file, cloud_stat) in enumerate(cloud_stats.items()):
             local_path = local_paths[i]
-            if local_path not in local_paths_all or is_sync_needed(
-                cloud_stat, local_paths_all[local_path]
+            local_stat = local_paths_all.get(local_path)
+            if (
+                local_stat is None
+                or is_sync_needed(cloud_stat, local_stat)
+                # an overwrite within the same second only changes the etag
+                or _etag_changed(local_stat, cloud_etags.get(cloud_file))
             ):
                 cloud_files_sync.append(cloud_file)
                 local_files_sync.append(local_path.as_posix())
@@ -647,39 +770,69 @@ def synchronize_to(
 
         use_boto3 = False
         if protocol == "s3" and not is_dir and not disable_boto3:
-            # use boto3 to download large single files as this is faster than s3fs
-            use_boto3 = kwargs.pop("use_boto3", cloud_info["size"] >= 524288000)
-
-        if use_boto3:
-            assert len(local_files_sync) == 1
-            origin.download_to(
-                local_files_sync[0],
-                callback=callback,  # ProgressCallback or passed or NoOpCallback
-                use_boto3=True,
-                stat_info=cloud_info,
-                **kwargs,
-            )
-        else:
-            origin.fs.download(
-                cloud_files_sync,
-                local_files_sync,
-                recursive=False,
-                callback=callback,
-                **kwargs,
-            )
-        if not use_size:
-            for i, cloud_file in enumerate(cloud_files_sync):
+            use_boto3 = kwargs.pop("use_boto3", False)
+
+        # download to partial files that are renamed when they are complete
+        # so that an interrupted download is never mistaken for a synchronized file
+        partial_files_sync = [
+            partial_path(Path(local_file)).as_posix() for local_file in local_files_sync
+        ]
+        try:
+            if not is_dir:
+                # large single files are downloaded in concurrent byte-range requests
+                assert len(local_files_sync) == 1
+                origin.download_to(
+                    partial_files_sync[0],
+                    callback=callback,  # ProgressCallback or passed or NoOpCallback
+                    use_boto3=use_boto3,
+                    stat_info=cloud_info,
+                    **kwargs,
+                )
+            else:
+                origin.fs.download(
+                    cloud_files_sync,
+                    partial_files_sync,
+                    recursive=False,
+                    callback=callback,
+                    **kwargs,
+                )
+        except BaseException:
+            for partial_file in partial_files_sync:
+                # keep the partial files that can be resumed
+                if not Path(partial_file + STATE_SUFFIX).exists():
+                    Path(partial_file).unlink(missing_ok=True)
+            raise
+        for i, cloud_file in enumerate(cloud_files_sync):
+            if not use_size:
                 cloud_mtime = cloud_stats[cloud_file]
-                os.utime(local_files_sync[i], times=(cloud_mtime, cloud_mtime))
+                os.utime(partial_files_sync[i], times=(cloud_mtime, cloud_mtime))
+            Path(partial_files_sync[i]).replace(local_files_sync[i])
+        if cache_index is not None:
+            downloaded = {}
+            for cloud_file, local_file in zip(
+                cloud_files_sync, local_files_sync, strict=True
+            ):
+                local_path = Path(local_file)
+                stat = local_path.stat()
+                downloaded[local_path] = IndexedStat(
+                    stat.st_size, stat.st_mtime, cloud_etags.get(cloud_file)
+                )
+            cache_index.index_files(
+                destination, downloaded, replace=not destination_exists
+            )
     else:
         return False
 
     if is_dir and local_paths_all:
-        for path in (path for path in local_paths_all if path not in local_paths):
-            path.unlink()
+        local_paths_set = set(local_paths)
+        deleted = [path for path in local_paths_all if path not in local_paths_set]
+        for path in deleted:
+            path.unlink(missing_ok=True)
             parent = path.parent
-            if next(parent.iterdir(), None) is None:
+            if parent.exists() and next(parent.iterdir(), None) is None:
                 parent.rmdir()
+        if cache_index is not None and deleted:
+            cache_index.remove_files(deleted)
 
     return True
 
@@ -1241,15 +1394,14 @@ def get_stat_file_cloud(stat: dict, protocol: str, accessor: str | None = None):
         assert accessor in stat
         etag = stat[accessor].strip('"=')
         if "-" not in etag:
-            # only store hash for non-multipart uploads
-            # we can't rapidly validate multi-part uploaded files client-side
-            # we can add more logic later down-the-road
             hash = b16_to_b64(etag)
             hash_type = "md5"
         else:
+            # this is the S3 chunk-hashing strategy, local files can be validated
+            # against it with hashing.validate_multipart_hash
             stripped_etag, suffix = etag.split("-")
             hash = b16_to_b64(stripped_etag)
-            hash_type = f"md5-{suffix}"  # this is the S3 chunk-hashing strategy
+            hash_type = f"md5-{suffix}"
     elif protocol == "hf":
         if accessor is None:
             accessor = "blob_id"
@@ -1298,23 +1450,32 @@ def get_stat_dir_cloud(path: UPath) -> tuple[int, str | None, str | None, int]:
         accessor = "ETag"
     else:
         compute_list_hash = False
-    sizes = []
-    hashes = []
-    for object in objects:
-        if compute_list_hash:
-            size, fhash, _ = get_stat_file_cloud(object, protocol, accessor)
-            sizes.append(size)
-            # this check is effectively only for http/https directories
-            if fhash is None:
-                compute_list_hash = False
-                continue
-            hashes.append(fhash)
-        else:
-            sizes.append(object["size"])
-    size = sum(sizes)
-    n_files = len(sizes)
+    # sizes and hashes are streamed to not keep them in memory for huge directories
+    size = 0
+    n_files = 0
+
+    def hashes():
+        nonlocal size, n_files, compute_list_hash
+        for object in objects:
+            n_files += 1
+            if compute_list_hash:
+                fsize, fhash, _ = get_stat_file_cloud(object, protocol, accessor)
+                size += fsize
+                # this check is effectively only for http/https directories
+                if fhash is None:
+                    compute_list_hash = False
+                    continue
+                yield fhash
+            else:
+                size += object["size"]
+
     if compute_list_hash:
-        hash, hash_type = hash_from_hashes_list(hashes), "md5-d"
+        list_hash = hash_from_hashes_list(hashes())
+        if compute_list_hash:
+            hash, hash_type = list_hash, "md5-d"
+    else:
+        for _ in hashes():
+            pass
     return size, hash, hash_type, n_files
 
 
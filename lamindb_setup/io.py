@@ -2,8 +2,19 @@ from __future__ import annotations
 
 import io
 import json
-import warnings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import sqlite3
+import threading
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    FIRST_EXCEPTION,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
 from importlib import import_module
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -14,6 +25,12 @@ if TYPE_CHECKING:
     from collections.abc import Iterable
     from typing import Literal
 
+    import pandas as pd
+    from fsspec import AbstractFileSystem
+
+    from .core.upath import UPath
+    from .types import AnyPathStr
+
 
 def _import_schema_module(module_name: str):
     try:
@@ -42,29 +59,728 @@ def _get_registries(module_name: str) -> list[str]:
     ]
 
 
+def _arrow_source(path: UPath) -> tuple[str, AbstractFileSystem | None]:
+    """The path and the filesystem to read a local or a cloud file with pyarrow.
+
+    pyarrow reads cloud files through the fsspec filesystem of the path with ranged
+    requests, so the credentials of `create_path` are reused.
+    """
+    from .core.upath import LocalPathClasses
+
+    if isinstance(path, LocalPathClasses):
+        return path.as_posix(), None
+    return path.path, path.fs
+
+
+@contextmanager
+def _open_parquet_writer(path: UPath, schema, writer_options: dict | None = None):
+    """Open a parquet writer for a local or a cloud file.
+
+    Cloud files are written through a buffered fsspec file that uploads every
+    `S3_DEFAULT_PART_SIZE` bytes as a part of a multipart upload, so row groups are
+    streamed to the cloud without a local copy of the file.
+    """
+    import pyarrow.parquet as pq
+
+    from .core.hashing import S3_DEFAULT_PART_SIZE
+    from .core.upath import LocalPathClasses
+
+    writer_options = writer_options or {}
+    if isinstance(path, LocalPathClasses):
+        with pq.ParquetWriter(path, schema, **writer_options) as writer:
+            yield writer
+    else:
+        with (
+            path.fs.open(path.path, "wb", block_size=S3_DEFAULT_PART_SIZE) as file,
+            pq.ParquetWriter(file, schema, **writer_options) as writer,
+        ):
+            yield writer
+
+
+# Size of the CSV blocks parsed at once when streaming COPY TO output into parquet
+COPY_BLOCK_SIZE = 16 * 1024**2
+# Rows formatted at once when streaming a DataFrame into COPY FROM
+COPY_CSV_CHUNK_ROWS = 100_000
+# PostgreSQL tables with more rows than this (according to the planner statistics)
+# are exported by concurrent COPY jobs over ranges of their primary key
+SHARD_SIZE = 5_000_000
+# Parquet schema metadata key of the Django field types of the exported columns
+EXPORT_SCHEMA_METADATA_KEY = "lamindb_setup.field_types"
+MANIFEST_FILENAME = "export_manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+# Rows per executemany call when loading SQLite tables
+SQLITE_BATCH_SIZE = 50_000
+# The secondary indexes of SQLite tables are re-created after loading this many rows
+SQLITE_REBUILD_INDEXES_MIN_ROWS = 100_000
+# Progress of interrupted exports and imports that can be resumed
+EXPORT_CHECKPOINT_FILENAME = "export_checkpoint.json"
+IMPORT_CHECKPOINT_FILENAME = "import_checkpoint.json"
+
+_ARROW_INTEGER_FIELDS = {
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+}
+
+
+def _arrow_type(field: models.Field):
+    """The arrow type of a field in exported parquet files."""
+    import pyarrow as pa
+
+    # foreign keys are stored with the type of the referenced column
+    while field.is_relation and getattr(field, "target_field", None) is not None:
+        field = field.target_field
+    internal_type = field.get_internal_type()
+    if internal_type in _ARROW_INTEGER_FIELDS:
+        return pa.int64()
+    if internal_type in ("FloatField", "DecimalField"):
+        return pa.float64()
+    if internal_type == "BooleanField":
+        return pa.bool_()
+    if internal_type == "DateTimeField":
+        return pa.timestamp("us", tz="UTC")
+    if internal_type == "DateField":
+        return pa.date32()
+    if internal_type == "JSONField":
+        # serialized JSON can exceed the 2 GB limit of string arrays in a row group
+        return pa.large_string()
+    # UUIDs and everything else are exported as text
+    return pa.string()
+
+
+def _export_schema(
+    registry: type[models.Model],
+    column_names: list[str],
+    text_columns: Iterable[str] = (),
+):
+    """The arrow schema of the exported parquet file of a registry table.
+
+    The Django field types of the columns are stored in the schema metadata under
+    `EXPORT_SCHEMA_METADATA_KEY` so that `import_db` knows that the columns don't
+    need to be converted. The columns in `text_columns` are exported as text.
+    """
+    import pyarrow as pa
+
+    fields = {
+        field.column: field
+        for field in registry._meta.fields
+        if field.column not in text_columns
+    }
+    # columns unknown to the model, e.g. `_old` foreign keys, are exported as text
+    field_types = {
+        name: fields[name].get_internal_type() if name in fields else None
+        for name in column_names
+    }
+    return pa.schema(
+        [
+            (name, _arrow_type(fields[name]) if name in fields else pa.string())
+            for name in column_names
+        ],
+        metadata={EXPORT_SCHEMA_METADATA_KEY: json.dumps(field_types)},
+    )
+
+
+def _pg_export_schema(registry: type[models.Model], connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT * FROM "{registry._meta.db_table}" LIMIT 0')
+        column_names = [column[0] for column in cursor.description]
+    return _export_schema(registry, column_names)
+
+
+class _RowGroupWriter:
+    """Buffer arrow tables and write them as row groups of `row_group_size` rows.
+
+    Several `_RowGroupWriter` instances can share a parquet writer through `lock`.
+    """
+
+    def __init__(self, writer, row_group_size: int, lock: threading.Lock | None = None):
+        self.writer = writer
+        self.row_group_size = row_group_size
+        self.lock = lock
+        self._pending: list = []
+        self._n_pending = 0
+
+    def write(self, table) -> None:
+        import pyarrow as pa
+
+        self._pending.append(table)
+        self._n_pending += table.num_rows
+        if self._n_pending < self.row_group_size:
+            return
+        table = pa.concat_tables(self._pending)
+        n_full = self._n_pending - self._n_pending % self.row_group_size
+        self._write(table.slice(0, n_full))
+        rest = table.slice(n_full)
+        self._pending = [rest] if rest.num_rows else []
+        self._n_pending = rest.num_rows
+
+    def flush(self) -> None:
+        import pyarrow as pa
+
+        if self._n_pending:
+            self._write(pa.concat_tables(self._pending))
+        self._pending = []
+        self._n_pending = 0
+
+    def _write(self, table) -> None:
+        if self.lock is None:
+            self.writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            with self.lock:
+                self.writer.write_table(table, row_group_size=self.row_group_size)
+
+
+def _copy_to_parquet_writer(
+    connection, query: str, column_types: dict, writer: _RowGroupWriter
+) -> None:
+    """Stream the CSV output of a `COPY ... TO STDOUT` query into a parquet writer.
+
+    `copy_expert` writes into a pipe in the calling thread because Django connections
+    are thread-local, a reader thread parses the CSV incrementally with pyarrow and
+    passes it on to `writer`. The pipe buffer bounds the memory between both.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        true_values=["t"],
+        false_values=["f"],
+        # COPY writes NULL unquoted and empty strings quoted
+        null_values=[""],
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=False,
+    )
+
+    read_fd, write_fd = os.pipe()
+    reader_error: list[BaseException] = []
+
+    def read_csv():
+        try:
+            with os.fdopen(read_fd, "rb") as source:
+                reader = pa_csv.open_csv(
+                    source,
+                    read_options=pa_csv.ReadOptions(block_size=COPY_BLOCK_SIZE),
+                    parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                    convert_options=convert_options,
+                )
+                for batch in reader:
+                    writer.write(pa.Table.from_batches([batch]))
+                writer.flush()
+        except Exception as e:
+            # the closed pipe makes copy_expert fail instead of blocking forever
+            reader_error.append(e)
+
+    reader_thread = threading.Thread(target=read_csv, daemon=True)
+    reader_thread.start()
+    try:
+        with os.fdopen(write_fd, "wb") as sink, connection.cursor() as cursor:
+            cursor.execute("SET statement_timeout = 0")
+            cursor.copy_expert(
+                f"{query} TO STDOUT WITH (FORMAT CSV, HEADER TRUE)", sink
+            )
+    except BaseException as copy_error:
+        reader_thread.join()
+        # a failed reader breaks the pipe, the reader error is the cause
+        if reader_error:
+            raise copy_error from reader_error[0]
+        raise
+    reader_thread.join()
+    if reader_error:
+        raise reader_error[0]
+
+
+def _id_ranges(
+    min_id: int, max_id: int, n_ranges: int
+) -> list[tuple[int | None, int | None]]:
+    """Split `[min_id, max_id]` into contiguous inclusive ranges of similar width.
+
+    The first and the last range are open-ended so that rows inserted during the
+    export are not lost.
+    """
+    step = max(1, -(-(max_id - min_id + 1) // n_ranges))
+    ranges: list[tuple[int | None, int | None]] = [
+        (start, min(start + step - 1, max_id))
+        for start in range(min_id, max_id + 1, step)
+    ]
+    ranges[0] = (None, ranges[0][1])
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def _pg_shard_ranges(
+    registry: type[models.Model], connection
+) -> list[tuple[int | None, int | None]]:
+    """Primary key ranges to export a large table with, empty for smaller tables."""
+    import pyarrow as pa
+
+    table_name = registry._meta.db_table
+    pk = registry._meta.pk
+    if pk is None or _arrow_type(pk) != pa.int64():
+        return []
+    with connection.cursor() as cursor:
+        # the planner estimate avoids a full scan for COUNT(*), it's -1 or 0 for
+        # tables that were never analyzed
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [f'"{table_name}"'],
+        )
+        n_rows = cursor.fetchone()[0]
+        if n_rows <= SHARD_SIZE:
+            return []
+        cursor.execute(
+            f'SELECT MIN("{pk.column}"), MAX("{pk.column}") FROM "{table_name}"'
+        )
+        min_id, max_id = cursor.fetchone()
+    if min_id is None:
+        return []
+    return _id_ranges(min_id, max_id, -(-n_rows // SHARD_SIZE))
+
+
+def _copy_shard_to_parquet_writer(
+    table_name: str,
+    key: str,
+    id_range: tuple[int | None, int | None],
+    column_types: dict,
+    writer,
+    row_group_size: int,
+    lock: threading.Lock,
+) -> None:
+    from django.db import connection
+
+    start, end = id_range
+    conditions = []
+    if start is not None:
+        conditions.append(f'"{key}" >= {int(start)}')
+    if end is not None:
+        conditions.append(f'"{key}" <= {int(end)}')
+    where = " AND ".join(conditions) or "TRUE"
+    try:
+        _copy_to_parquet_writer(
+            connection,
+            f'COPY (SELECT * FROM "{table_name}" WHERE {where})',
+            column_types,
+            _RowGroupWriter(writer, row_group_size, lock),
+        )
+    finally:
+        # every shard runs on a pool thread with its own connection
+        connection.close()
+
+
+def _copy_table_to_parquet(
+    registry: type[models.Model],
+    connection,
+    path: UPath,
+    row_group_size: int,
+    shard_executor: ThreadPoolExecutor | None = None,
+    writer_options: dict | None = None,
+    watermark: dict | None = None,
+) -> None:
+    """Stream `COPY TO` of a PostgreSQL table into a parquet file.
+
+    If `shard_executor` is passed, tables with more than `SHARD_SIZE` rows are split
+    into primary key ranges that are copied concurrently on separate connections
+    and appended to the same parquet file as row groups.
+
+    If `watermark` is passed, only rows above it are exported.
+    """
+    import pyarrow.parquet as pq
+
+    table_name = registry._meta.db_table
+    schema = _pg_export_schema(registry, connection)
+    column_types = dict(zip(schema.names, schema.types, strict=True))
+    query = f'COPY "{table_name}"'
+    if watermark is not None:
+        pk_column, updated_at_column = _watermark_columns(registry)
+        conditions = [f'"{pk_column}" > {int(_watermark_id(watermark))}']
+        if updated_at_column is not None and watermark["updated_at"] is not None:
+            # round-trip through datetime so that only a valid timestamp is inlined
+            updated_at = datetime.fromisoformat(watermark["updated_at"]).isoformat()
+            conditions.append(f"\"{updated_at_column}\" > '{updated_at}'::timestamptz")
+        query = f'COPY (SELECT * FROM "{table_name}" WHERE {" OR ".join(conditions)})'
+    id_ranges = (
+        _pg_shard_ranges(registry, connection)
+        if shard_executor is not None and watermark is None
+        else []
+    )
+    try:
+        with _open_parquet_writer(path, schema, writer_options) as writer:
+            if len(id_ranges) > 1:
+                lock = threading.Lock()
+                futures = [
+                    shard_executor.submit(  # type: ignore[union-attr]
+                        _copy_shard_to_parquet_writer,
+                        table_name,
+                        registry._meta.pk.column,  # type: ignore[union-attr]
+                        id_range,
+                        column_types,
+                        writer,
+                        row_group_size,
+                        lock,
+                    )
+                    for id_range in id_ranges
+                ]
+                wait(futures, return_when=FIRST_EXCEPTION)
+                for future in futures:
+                    future.cancel()
+                # the writer must not be closed while shards are still writing
+                wait(futures)
+                for future in futures:
+                    if not future.cancelled():
+                        future.result()
+            else:
+                _copy_to_parquet_writer(
+                    connection,
+                    query,
+                    column_types,
+                    _RowGroupWriter(writer, row_group_size),
+                )
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+
+class _UnparseableColumnError(Exception):
+    """A SQLite column has values that can't be converted to its arrow type."""
+
+    def __init__(self, column: str, arrow_type):
+        super().__init__(f"column '{column}' has values that aren't {arrow_type}")
+        self.column = column
+
+
+def _to_arrow_array(values: list, arrow_type):
+    import pyarrow as pa
+
+    errors = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+    try:
+        return pa.array(values).cast(arrow_type)
+    except errors:
+        if pa.types.is_timestamp(arrow_type):
+            try:
+                # Django stores UTC timestamps in SQLite without a zone offset
+                return (
+                    pa.array(values)
+                    .cast(pa.timestamp(arrow_type.unit))
+                    .cast(arrow_type)
+                )
+            except errors:
+                pass
+        if not (pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)):
+            raise
+        # SQLite doesn't enforce column types, mixed values are exported as text
+        return pa.array([None if v is None else str(v) for v in values], arrow_type)
+
+
+def _write_sqlite_pages(
+    conn: sqlite3.Connection,
+    query: str,
+    params: list,
+    schema,
+    path: UPath,
+    chunk_size: int,
+    row_group_size: int,
+    writer_options: dict | None,
+) -> None:
+    import pyarrow as pa
+
+    errors = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+    with _open_parquet_writer(path, schema, writer_options) as writer:
+        row_group_writer = _RowGroupWriter(writer, row_group_size)
+        last_key = -(2**63)
+        while True:
+            rows = conn.execute(query, (last_key, *params, chunk_size)).fetchall()
+            if not rows:
+                break
+            last_key = rows[-1][0]
+            columns = list(zip(*rows, strict=True))[1:]
+            arrays = []
+            for values, field in zip(columns, schema, strict=True):
+                try:
+                    arrays.append(_to_arrow_array(list(values), field.type))
+                except errors as e:
+                    raise _UnparseableColumnError(field.name, field.type) from e
+            row_group_writer.write(pa.Table.from_arrays(arrays, schema=schema))
+            if len(rows) < chunk_size:
+                break
+        row_group_writer.flush()
+
+
+def _select_table_to_parquet(
+    registry: type[models.Model],
+    sqlite_path: str,
+    path: UPath,
+    chunk_size: int,
+    row_group_size: int,
+    writer_options: dict | None = None,
+    watermark: dict | None = None,
+) -> None:
+    """Page through a SQLite table with a keyset cursor and write it to a parquet file.
+
+    `WHERE key > last_key ORDER BY key LIMIT chunk_size` is an index lookup per page
+    whereas `LIMIT ... OFFSET ...` rescans all skipped rows. Tables without an integer
+    primary key are paged by `rowid`.
+
+    If `watermark` is passed, only rows above it are exported.
+    """
+    import pyarrow as pa
+    from lamin_utils import logger
+
+    table_name = registry._meta.db_table
+    pk = registry._meta.pk
+    key = (
+        f'"{pk.column}"'
+        if pk is not None and _arrow_type(pk) == pa.int64()
+        else "rowid"
+    )
+    condition = "TRUE"
+    params: list = []
+    if watermark is not None:
+        pk_column, updated_at_column = _watermark_columns(registry)
+        condition = f'"{pk_column}" > ?'
+        params = [_watermark_id(watermark)]
+        if updated_at_column is not None and watermark["updated_at"] is not None:
+            # the stored text format varies, julianday() parses all of them but only
+            # has millisecond precision, rows at the watermark are exported again
+            condition += f' OR julianday("{updated_at_column}") >= julianday(?)'
+            params.append(watermark["updated_at"])
+    query = (
+        f'SELECT {key}, * FROM "{table_name}" WHERE {key} > ? AND ({condition})'
+        f" ORDER BY {key} LIMIT ?"
+    )
+
+    # no detect_types so that values are converted from how they are stored
+    conn = sqlite3.connect(sqlite_path)
+    try:
+        cursor = conn.execute(f'SELECT * FROM "{table_name}" LIMIT 0')
+        column_names = [column[0] for column in cursor.description]
+        text_columns: set[str] = set()
+        while True:
+            schema = _export_schema(registry, column_names, text_columns)
+            try:
+                _write_sqlite_pages(
+                    conn,
+                    query,
+                    params,
+                    schema,
+                    path,
+                    chunk_size,
+                    row_group_size,
+                    writer_options,
+                )
+                break
+            except _UnparseableColumnError as e:
+                # SQLite doesn't enforce column types, restart with the column as text
+                logger.warning(f"{e} in table '{table_name}', exporting it as text")
+                text_columns.add(e.column)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    finally:
+        conn.close()
+
+
+def _watermark_columns(registry: type[models.Model]) -> tuple[str | None, str | None]:
+    """The integer primary key and the `updated_at` columns of a registry if any."""
+    import pyarrow as pa
+
+    pk = registry._meta.pk
+    pk_column = pk.column if pk is not None and _arrow_type(pk) == pa.int64() else None
+    updated_at_column = next(
+        (
+            field.column
+            for field in registry._meta.fields
+            if field.name == "updated_at"
+            and field.get_internal_type() == "DateTimeField"
+        ),
+        None,
+    )
+    return pk_column, updated_at_column
+
+
+def _column_max(path: UPath, column: str):
+    """The maximum of a column of a parquet file from the row group statistics."""
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    source, filesystem = _arrow_source(path)
+    metadata = pq.read_metadata(source, filesystem=filesystem)
+    index = metadata.schema.to_arrow_schema().get_field_index(column)
+    maxima = []
+    for i in range(metadata.num_row_groups):
+        statistics = metadata.row_group(i).column(index).statistics
+        if statistics is None or not statistics.has_min_max:
+            if (
+                statistics is not None
+                and statistics.null_count == statistics.num_values
+            ):
+                continue
+            table = pq.read_table(source, columns=[column], filesystem=filesystem)
+            return pc.max(table[column]).as_py()
+        maxima.append(statistics.max)
+    return max(maxima, default=None)
+
+
+def _text_timestamp_max(path: UPath, column: str) -> datetime | None:
+    """The latest timestamp of a column that was exported as text.
+
+    The text maximum isn't the latest timestamp, values that aren't timestamps
+    are ignored.
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    source, filesystem = _arrow_source(path)
+    table = pq.read_table(source, columns=[column], filesystem=filesystem)
+    timestamps = pd.to_datetime(
+        table[column].to_pandas(), errors="coerce", utc=True, format="ISO8601"
+    )
+    latest = timestamps.max()
+    return None if pd.isna(latest) else latest.to_pydatetime()
+
+
+def _watermark(registry: type[models.Model], path: UPath) -> dict | None:
+    """The high-water marks of an exported parquet file.
+
+    `None` if the registry has no integer primary key that deltas can be applied by.
+    """
+    pk_column, updated_at_column = _watermark_columns(registry)
+    if pk_column is None:
+        return None
+    updated_at = (
+        _column_max(path, updated_at_column) if updated_at_column is not None else None
+    )
+    if isinstance(updated_at, str):
+        updated_at = _text_timestamp_max(path, updated_at_column)  # type: ignore[arg-type]
+    return {
+        "id": _column_max(path, pk_column),
+        "updated_at": updated_at.isoformat() if updated_at is not None else None,
+    }
+
+
+def _watermark_id(watermark: dict) -> int:
+    # the table was empty at the previous export
+    return watermark["id"] if watermark["id"] is not None else -(2**63)
+
+
+def _max_watermark(watermark: dict, other: dict) -> dict:
+    ids = [w["id"] for w in (watermark, other) if w["id"] is not None]
+    timestamps = [
+        datetime.fromisoformat(w["updated_at"])
+        for w in (watermark, other)
+        if w["updated_at"] is not None
+    ]
+    return {
+        "id": max(ids, default=None),
+        "updated_at": max(timestamps).isoformat() if timestamps else None,
+    }
+
+
+def _file_hash(path: UPath) -> tuple[int, str | None, str | None]:
+    """The size, hash and hash type of an exported file.
+
+    Cloud files aren't downloaded, their hash is derived from the object metadata.
+    """
+    from .core.hashing import hash_file
+    from .core.upath import LocalPathClasses, get_stat_file_cloud
+
+    if isinstance(path, LocalPathClasses):
+        return hash_file(path, chunk_size=None)
+    return get_stat_file_cloud(path.stat().as_info(), path.protocol)
+
+
+def _manifest_entry(registry_id: str, path: UPath) -> dict:
+    """Describe an exported parquet file in the export manifest."""
+    import pyarrow.parquet as pq
+
+    size, hash, hash_type = _file_hash(path)
+    source, filesystem = _arrow_source(path)
+    return {
+        "registry": registry_id,
+        "file": path.name,
+        "n_rows": pq.read_metadata(source, filesystem=filesystem).num_rows,
+        "size": size,
+        "hash": hash,
+        "hash_type": hash_type,
+    }
+
+
+def _read_checkpoint(path: UPath, expected: dict) -> dict | None:
+    """Read a checkpoint if it belongs to the same instance and modules."""
+    from lamin_utils import logger
+
+    if not path.exists():
+        return None
+    checkpoint = json.loads(path.read_text())
+    if any(checkpoint.get(key) != expected[key] for key in ("instance", "modules")):
+        logger.warning(f"{path} belongs to a different run, starting over")
+        return None
+    return checkpoint
+
+
+def _write_checkpoint(path: UPath, checkpoint: dict) -> None:
+    from .core.upath import LocalPathClasses
+
+    content = json.dumps(checkpoint, indent=2)
+    if isinstance(path, LocalPathClasses):
+        # an interruption must not leave a truncated checkpoint behind
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(content)
+        tmp_path.replace(path)
+    else:
+        path.write_text(content)
+
+
+def _is_missing_table_error(error: Exception) -> bool:
+    # PostgreSQL reports a missing table with the SQLSTATE 42P01 (undefined_table)
+    if isinstance(error, sqlite3.OperationalError):
+        return "no such table" in str(error)
+    return any(
+        getattr(cause, "pgcode", None) == "42P01"
+        for cause in (error.__cause__, error.__context__)
+    )
+
+
 def _export_full_table(
     registry_info: tuple[str, str, str | None],
-    directory: Path,
+    directory: UPath,
     chunk_size: int,
-) -> list[tuple[str, Path]] | str:
+    shard_executor: ThreadPoolExecutor | None = None,
+    row_group_size: int | None = None,
+    writer_options: dict | None = None,
+    previous: dict | None = None,
+) -> dict:
     """Export a registry table to parquet.
 
     For PostgreSQL, uses COPY TO which streams the table directly to CSV format,
     bypassing query planner overhead and row-by-row conversion (10-50x faster than SELECT).
+    The CSV stream is converted to parquet row groups on the fly, so memory use does not
+    depend on the table size. Large tables are split into primary key ranges that are
+    copied concurrently through `shard_executor`.
 
-    For SQLite with large tables, reads in chunks to avoid memory issues when tables exceed available RAM.
+    For SQLite, pages through the table in primary key order (keyset pagination, no OFFSET
+    scans), so memory use is bounded by `chunk_size`.
 
     Args:
         registry_info: Tuple of (module_name, model_name, field_name) where `field_name`
             is None for regular tables or the field name for M2M link tables.
         directory: Output directory for parquet files.
-        chunk_size: Maximum rows per chunk for SQLite large tables.
+        chunk_size: Number of rows read at once from SQLite tables.
+        shard_executor: Executor for the primary key ranges of large PostgreSQL tables.
+        row_group_size: Maximum rows per parquet row group, defaults to `chunk_size`.
+        writer_options: Keyword arguments for `pyarrow.parquet.ParquetWriter`.
+        previous: The manifest entry of a previous export. If it has a watermark, only
+            the rows above the watermark are written to a new delta file.
 
     Returns:
-        String identifier for single-file exports, or list of (table_name, chunk_path) tuples for chunked exports that need merging.
+        The manifest entry of the exported table.
     """
-    import pandas as pd
-    from django.db import connection
+    from django.db import DatabaseError, connection
 
     import lamindb_setup as ln_setup
 
@@ -76,244 +792,628 @@ def _export_full_table(
         registry = getattr(registry, field_name).through
 
     table_name = registry._meta.db_table
+    row_group_size = row_group_size or chunk_size
+    watermark = previous.get("watermark") if previous is not None else None
+    if watermark is not None:
+        deltas = previous.get("deltas", [])
+        path = directory / f"{table_name}.delta-{len(deltas) + 1:04d}.parquet"
+    else:
+        path = directory / f"{table_name}.parquet"
 
     try:
         if ln_setup.settings.instance.dialect == "postgresql":
-            buffer = io.StringIO()
-            with connection.cursor() as cursor:
-                cursor.execute("SET statement_timeout = 0")
-                cursor.copy_expert(
-                    f'COPY "{table_name}" TO STDOUT WITH (FORMAT CSV, HEADER TRUE)',
-                    buffer,
-                )
-            buffer.seek(0)
-            # Prevent pandas from converting empty strings to float NaN (which PyArrow rejects)
-            df = pd.read_csv(buffer, keep_default_na=False)
-            # Convert object columns to string to handle mixed types from data corruption,
-            # schema migrations, or manual SQL inserts. PyArrow rejects mixed-type objects.
-            df = df.astype(
-                {col: str for col in df.columns if df[col].dtype == "object"}
-            )
-            df.to_parquet(directory / f"{table_name}.parquet", compression=None)
-            return (
-                f"{module_name}.{model_name}.{field_name}"
-                if field_name
-                else f"{module_name}.{model_name}"
+            _copy_table_to_parquet(
+                registry,
+                connection,
+                path,
+                row_group_size,
+                shard_executor,
+                writer_options,
+                watermark,
             )
         else:
-            with warnings.catch_warnings():
-                warnings.filterwarnings(
-                    "ignore", message="Skipped unsupported reflection"
-                )
-                row_count = pd.read_sql(
-                    f"SELECT COUNT(*) as count FROM {table_name}",
-                    ln_setup.settings.instance.db,
-                ).iloc[0]["count"]
-
-                if row_count > chunk_size:
-                    chunk_files = []
-                    num_chunks = (row_count + chunk_size - 1) // chunk_size
-                    for chunk_id in range(num_chunks):
-                        offset = chunk_id * chunk_size
-                        df = pd.read_sql(
-                            f"SELECT * FROM {table_name} LIMIT {chunk_size} OFFSET {offset}",
-                            ln_setup.settings.instance.db,
-                        )
-                        chunk_file = (
-                            directory / f"{table_name}_chunk_{chunk_id}.parquet"
-                        )
-                        df = df.astype(
-                            {
-                                col: str
-                                for col in df.columns
-                                if df[col].dtype == "object"
-                            }
-                        )
-                        df.to_parquet(chunk_file, compression=None)
-                        chunk_files.append((table_name, chunk_file))
-                    return chunk_files
-                else:
-                    df = pd.read_sql_table(table_name, ln_setup.settings.instance.db)
-                    df = df.astype(
-                        {col: str for col in df.columns if df[col].dtype == "object"}
-                    )
-                    df.to_parquet(directory / f"{table_name}.parquet", compression=None)
-                    return (
-                        f"{module_name}.{model_name}.{field_name}"
-                        if field_name
-                        else f"{module_name}.{model_name}"
-                    )
-    except (ValueError, pd.errors.DatabaseError):
+            db = ln_setup.settings.instance.db
+            _select_table_to_parquet(
+                registry,
+                db.removeprefix("sqlite:///"),
+                path,
+                chunk_size,
+                row_group_size,
+                writer_options,
+                watermark,
+            )
+    except (DatabaseError, sqlite3.OperationalError) as e:
+        if not _is_missing_table_error(e):
+            raise
         raise ValueError(
             f"Table '{table_name}' was not found. The instance might need to be migrated."
         ) from None
 
+    registry_id = (
+        f"{module_name}.{model_name}.{field_name}"
+        if field_name
+        else f"{module_name}.{model_name}"
+    )
+    entry = _manifest_entry(registry_id, path)
+    if watermark is not None:
+        if entry["n_rows"] == 0:
+            path.unlink()
+            return previous
+        entry.pop("registry")
+        entry["watermark"] = _watermark(registry, path)
+        return {
+            **previous,
+            "watermark": _max_watermark(watermark, entry["watermark"]),
+            "deltas": [*deltas, entry],
+        }
+    # a full export supersedes the deltas of previous exports
+    for delta_path in directory.glob(f"{table_name}.delta-*.parquet"):
+        delta_path.unlink()
+    entry["watermark"] = _watermark(registry, path)
+    entry["deltas"] = []
+    return entry
+
 
 def export_db(
     module_names: Iterable[str] | None = None,
     *,
-    output_dir: str | Path | None = None,
+    output_dir: AnyPathStr | None = None,
     max_workers: int = 8,
     chunk_size: int = 500_000,
+    max_connections: int | None = None,
+    compression: Literal["zstd", "snappy", "lz4", "gzip", "brotli"] | None = None,
+    compression_level: int | None = None,
+    row_group_size: int | None = None,
+    incremental: bool = False,
+    resume: bool = False,
 ) -> None:
     """Export registry tables and many-to-many link tables to parquet files.
 
     Ensure that you connect to postgres instances using `use_root_db_user=True`.
 
+    Besides one parquet file per table, writes an `export_manifest.json` with the
+    row counts, sizes and hashes of the files and the migration state of the instance,
+    which `import_db` uses to verify the export.
+
+    Finished tables are recorded in an `export_checkpoint.json` until the manifest
+    is written, so that an interrupted export can be continued with `resume=True`.
+
     Args:
         module_names: Module names to export (e.g., ["lamindb", "bionty", "pertdb"]).
             Defaults to "lamindb" if not provided.
-        output_dir: Directory path for exported parquet files.
-        max_workers: Number of parallel processes.
-        chunk_size: Number of rows per chunk for large tables.
+        output_dir: Directory path for exported parquet files, a local path or a cloud
+            path like `s3://bucket/export/` that the files are streamed to.
+        max_workers: Number of tables that are exported concurrently.
+        chunk_size: Number of rows read at once from SQLite tables and the default
+            `row_group_size`. Every table is streamed into a single parquet file,
+            so the peak memory is bounded by one row group per worker.
+        max_connections: Maximum number of concurrent PostgreSQL connections. Every
+            table worker holds one, the remaining connections copy primary key ranges
+            of large tables concurrently. Defaults to `2 * max_workers`. Tables aren't
+            split if it's at most `max_workers`, and fewer tables are exported
+            concurrently if it's lower.
+        compression: Parquet compression codec, files are uncompressed if `None`.
+        compression_level: Compression level of the codec, uses the codec's default if `None`.
+        row_group_size: Maximum number of rows per parquet row group.
+            Defaults to `chunk_size`.
+        incremental: Only export the rows that were created or updated since the
+            export in `output_dir`. Every table records the maximum primary key and
+            `updated_at` in the manifest and the new rows are written to delta files
+            that `import_db` upserts by primary key. Deleted rows aren't tracked, so run
+            a full export periodically. Tables without an integer primary key are
+            always exported in full, and so is everything if the migrations changed.
+        resume: Skip the tables that an interrupted export with the same arguments
+            already finished according to the checkpoint in `output_dir`.
     """
-    import pandas as pd
+    from lamin_utils import logger
     from rich.progress import Progress
 
     import lamindb_setup as ln_setup
 
+    from ._migrate import migrate
+    from .core.upath import LocalPathClasses, create_path
+
     if output_dir is None:
         output_dir = f"./{ln_setup.settings.instance.name}_export/"
 
-    directory = Path(output_dir)
-    directory.mkdir(parents=True, exist_ok=True)
+    directory = create_path(output_dir)
+    if isinstance(directory, LocalPathClasses):
+        directory.mkdir(parents=True, exist_ok=True)
 
-    module_names = module_names or ["lamindb"]
+    module_names = list(module_names or ["lamindb"])
     modules = {name: _get_registries(name) for name in module_names}
+    writer_options = {
+        "compression": compression or "none",
+        "compression_level": compression_level,
+    }
 
-    tasks = []
+    # explicit through models are registries themselves, every table is exported once
+    tasks_by_table: dict[str, tuple[str, str, str | None]] = {}
     for module_name, model_names in modules.items():
         schema_module = _import_schema_module(module_name)
         for model_name in model_names:
             registry = getattr(schema_module.models, model_name)
-            tasks.append((module_name, model_name, None))
+            tasks_by_table.setdefault(
+                registry._meta.db_table, (module_name, model_name, None)
+            )
             for field in registry._meta.many_to_many:
-                tasks.append((module_name, model_name, field.name))
-
-    chunk_files_by_table: dict[str, list[Path]] = {}
+                link_orm = getattr(registry, field.name).through
+                tasks_by_table.setdefault(
+                    link_orm._meta.db_table, (module_name, model_name, field.name)
+                )
 
+    migrations = migrate.deployed_migrations(latest=True)
+    migrations = {app: name for app, name in migrations.items() if app in module_names}
+    previous_tables: dict[str, dict] = {}
+    manifest_path = directory / MANIFEST_FILENAME
+    if incremental and manifest_path.exists():
+        previous_manifest = json.loads(manifest_path.read_text())
+        if previous_manifest["instance"] != ln_setup.settings.instance.slug:
+            raise ValueError(
+                f"{directory} contains an export of {previous_manifest['instance']},"
+                " an incremental export needs to go to the same directory"
+            )
+        if previous_manifest["migrations"] != migrations:
+            logger.warning(
+                "the migrations changed since the last export, exporting all"
+            )
+        else:
+            previous_tables = previous_manifest["tables"]
+
+    checkpoint_path = directory / EXPORT_CHECKPOINT_FILENAME
+    checkpoint = {
+        "instance": ln_setup.settings.instance.slug,
+        "modules": module_names,
+        "tables": {},
+    }
+    if resume:
+        previous_checkpoint = _read_checkpoint(checkpoint_path, checkpoint)
+        if previous_checkpoint is not None:
+            checkpoint["tables"] = {
+                table_name: entry
+                for table_name, entry in previous_checkpoint["tables"].items()
+                if table_name in tasks_by_table and (directory / entry["file"]).exists()
+            }
+    tables = checkpoint["tables"]
+    remaining = {
+        table_name: task
+        for table_name, task in tasks_by_table.items()
+        if table_name not in tables
+    }
+    _write_checkpoint(checkpoint_path, checkpoint)
+
+    n_shard_workers = 0
+    if ln_setup.settings.instance.dialect == "postgresql":
+        max_connections = max_connections or 2 * max_workers
+        max_workers = min(max_workers, max_connections)
+        n_shard_workers = max_connections - max_workers
+
+    error = None
     with Progress() as progress:
-        task_id = progress.add_task("Exporting", total=len(tasks))
+        task_id = progress.add_task(
+            "Exporting", total=len(tasks_by_table), completed=len(tables)
+        )
 
         # This must be a ThreadPoolExecutor and not a ProcessPoolExecutor to inherit JWTs
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Shards of large PostgreSQL tables run in a separate pool so that they can't
+        # wait on table tasks that wait on them
+        with (
+            ThreadPoolExecutor(max_workers=max_workers) as executor,
+            (
+                ThreadPoolExecutor(max_workers=n_shard_workers)
+                if n_shard_workers > 0
+                else nullcontext()
+            ) as shard_executor,
+        ):
             futures = {
-                executor.submit(_export_full_table, task, directory, chunk_size): task
-                for task in tasks
+                executor.submit(
+                    _export_full_table,
+                    task,
+                    directory,
+                    chunk_size,
+                    shard_executor,
+                    row_group_size,
+                    writer_options,
+                    previous_tables.get(table_name),
+                ): table_name
+                for table_name, task in remaining.items()
             }
 
+            # the other tables are finished and checkpointed before an error is raised
             for future in as_completed(futures):
-                result = future.result()
-                if isinstance(result, list):
-                    for table_name, chunk_file in result:
-                        chunk_files_by_table.setdefault(table_name, []).append(
-                            chunk_file
-                        )
+                try:
+                    tables[futures[future]] = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                _write_checkpoint(checkpoint_path, checkpoint)
                 progress.advance(task_id)
+    if error is not None:
+        raise error
+
+    manifest = {
+        "format_version": MANIFEST_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "instance": ln_setup.settings.instance.slug,
+        "dialect": ln_setup.settings.instance.dialect,
+        "modules": module_names,
+        "migrations": migrations,
+        "tables": dict(sorted(tables.items())),
+    }
+    (directory / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2))
+    checkpoint_path.unlink(missing_ok=True)
+
+
+# Boolean literals of PostgreSQL CSV exports and of pandas
+_BOOLEAN_VALUES = {
+    "t": True,
+    "true": True,
+    "1": True,
+    "f": False,
+    "false": False,
+    "0": False,
+}
+_NUMERIC_FIELDS = {
+    "IntegerField": "int64",
+    "BigIntegerField": "int64",
+    "PositiveIntegerField": "int64",
+    "FloatField": "float64",
+    "DecimalField": "float64",
+}
+
+
+def _is_nested(arrow_type) -> bool:
+    import pyarrow as pa
+
+    return (
+        pa.types.is_list(arrow_type)
+        or pa.types.is_large_list(arrow_type)
+        or pa.types.is_fixed_size_list(arrow_type)
+        or pa.types.is_struct(arrow_type)
+        or pa.types.is_map(arrow_type)
+    )
+
+
+def _is_string(arrow_type) -> bool:
+    import pyarrow as pa
+
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def _json_encode(column):
+    """Encode a nested column as JSON strings, one chunk at a time."""
+    import pyarrow as pa
+
+    return pa.chunked_array(
+        [
+            pa.array(
+                [None if v is None else json.dumps(v) for v in chunk.to_pylist()],
+                pa.large_string(),
+            )
+            for chunk in column.chunks
+        ],
+        pa.large_string(),
+    )
 
-    for table_name, chunk_files in chunk_files_by_table.items():
-        merged_df = pd.concat([pd.read_parquet(f) for f in sorted(chunk_files)])
-        merged_df.to_parquet(directory / f"{table_name}.parquet", compression=None)
-        for chunk_file in chunk_files:
-            chunk_file.unlink()
 
+def _empty_to_null(column):
+    import pyarrow as pa
+    import pyarrow.compute as pc
 
-def _serialize_value(val):
-    """Convert value to JSON string if it's a dict, list, or numpy array, otherwise return as-is."""
-    # keep dynamic import to minimize import time
-    import numpy as np
+    return pc.if_else(pc.equal(column, ""), pa.scalar(None, column.type), column)
 
-    if isinstance(val, (dict, list, np.ndarray)):
-        return json.dumps(
-            val, default=lambda o: o.tolist() if isinstance(o, np.ndarray) else None
-        )
-    return val
 
+def _to_boolean(column):
+    """Map boolean literals through the dictionary of the column, unknown values become null."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
 
-def _import_registry(
-    registry: type[models.Model],
-    directory: Path,
-    if_exists: Literal["fail", "replace", "append"] = "replace",
-) -> None:
-    """Import a single registry table from parquet.
+    if pa.types.is_boolean(column.type):
+        return column
+    if not _is_string(column.type):
+        return pc.cast(column, pa.bool_())
+    encoded = pc.dictionary_encode(column.combine_chunks())
+    mapping = pa.array(
+        [
+            _BOOLEAN_VALUES.get(value.lower())
+            for value in encoded.dictionary.to_pylist()
+        ],
+        pa.bool_(),
+    )
+    return mapping.take(encoded.indices)
 
-    For PostgreSQL, uses COPY FROM which bypasses SQL parsing and writes directly to
-    table pages (20-50x faster than multi-row INSERTs).
 
-    For SQLite, uses multi-row INSERTs with dynamic chunking to stay under the 999
-    variable limit (2-5x faster than single-row INSERTs).
-    """
-    import numpy as np
+def _to_numeric(column, arrow_type):
+    """Cast a column to a number type, values that aren't numbers become null."""
     import pandas as pd
-    from django.db import connection
-
-    table_name = registry._meta.db_table
-    parquet_file = directory / f"{table_name}.parquet"
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not _is_string(column.type):
+        return column
+    column = _empty_to_null(column)
+    for target_type in dict.fromkeys([arrow_type, pa.float64()]):
+        try:
+            return pc.cast(column, target_type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return pa.array(pd.to_numeric(column.to_pandas(), errors="coerce"))
+
+
+def _normalize_table(table, registry: type[models.Model]):
+    """Normalize the columns of parquet files that weren't written with field types.
+
+    Works on whole arrow columns and looks at the field type of every column once:
+    nested values are JSON-encoded, boolean and number fields are converted from their
+    string representations and empty strings of nullable fields become null.
+    """
+    import pyarrow as pa
+
+    fields = {field.column: field for field in registry._meta.fields}
+    columns = []
+    for name, column in zip(table.column_names, table.columns, strict=True):
+        if _is_nested(column.type):
+            column = _json_encode(column)
+        if (field := fields.get(name)) is not None:
+            internal_type = field.get_internal_type()
+            if internal_type == "BooleanField":
+                column = _to_boolean(column)
+            elif internal_type in _NUMERIC_FIELDS:
+                column = _to_numeric(
+                    column, pa.type_for_alias(_NUMERIC_FIELDS[internal_type])
+                )
+            elif field.null and _is_string(column.type):
+                # PostgreSQL CSV export writes NULL as empty string
+                column = _empty_to_null(column)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=table.column_names)
 
-    if not parquet_file.exists():
-        return
 
-    df = pd.read_parquet(parquet_file)
+def _read_registry_parquet(
+    parquet_file: UPath,
+    registry: type[models.Model],
+    if_exists: Literal["fail", "replace", "append"],
+) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+
+    source, filesystem = _arrow_source(parquet_file)
+    table = pq.read_table(source, filesystem=filesystem)
+    # files written by export_db store their field types and need no conversions
+    is_typed = EXPORT_SCHEMA_METADATA_KEY.encode() in (table.schema.metadata or {})
+    if not is_typed:
+        table = _normalize_table(table, registry)
+    # integer columns with NULLs would otherwise become float columns that PostgreSQL
+    # rejects when copying them into integer columns
+    df = table.to_pandas(integer_object_nulls=True)
 
     old_foreign_key_columns = [col for col in df.columns if col.endswith("_old")]
     if old_foreign_key_columns:
         df = df.drop(columns=old_foreign_key_columns)
 
-    for col in df.columns:
-        if df[col].dtype == "object":
-            mask = df[col].apply(lambda x: isinstance(x, (dict, list, np.ndarray)))
-            if mask.any():
-                df.loc[mask, col] = df.loc[mask, col].map(_serialize_value)
-
-    for field in registry._meta.fields:
-        # Convert PostgreSQL boolean string literals ('t'/'f') to Python booleans for SQLite compatibility
-        if field.get_internal_type() == "BooleanField" and field.column in df.columns:
-            df[field.column] = df[field.column].map(
-                {"t": True, "f": False, True: True, False: False, None: None}
-            )
-
-        # PostgreSQL CSV export writes NULL as empty string; convert back to None for nullable fields
-        if field.null and field.column in df.columns:
-            df[field.column] = df[field.column].replace("", None)
-
-        # Convert numeric fields from strings to proper types for SQLite
-        if (
-            field.get_internal_type()
-            in (
-                "IntegerField",
-                "BigIntegerField",
-                "PositiveIntegerField",
-                "FloatField",
-                "DecimalField",
-            )
-            and field.column in df.columns
-        ):
-            df[field.column] = pd.to_numeric(df[field.column], errors="coerce")
-
     if if_exists == "append":
         # Fill NULL values in NOT NULL columns to handle schema mismatches between postgres source and SQLite target
         # This allows importing data where fields were nullable
         for field in registry._meta.fields:
             if field.column in df.columns and not field.null:
                 df[field.column] = df[field.column].fillna("").infer_objects(copy=False)
+    return df
 
-    if df.empty:
-        return
 
-    if if_exists == "append":
-        # Clear existing data before import
-        # When appending we would run into duplicate errors because of existing values like branches etc
-        with connection.cursor() as cursor:
-            cursor.execute(f'DELETE FROM "{table_name}"')
+def _sqlite_value(value):
+    import numpy as np
+    import pandas as pd
 
-    if connection.vendor == "postgresql":
-        columns = df.columns.tolist()
-        column_names = ", ".join(f'"{col}"' for col in columns)
+    if (
+        value is None
+        or value is pd.NaT
+        or (isinstance(value, float) and np.isnan(value))
+    ):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return str(value.replace(tzinfo=None))
+    return value
+
+
+def _sqlite_column(column: pd.Series):
+    """Convert a column to an arrow array of values that sqlite3 can bind."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    try:
+        array = pa.array(column, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # columns with mixed types, e.g. NOT NULL columns filled with "" on append
+        return [_sqlite_value(value) for value in column]
+    if pa.types.is_timestamp(array.type):
+        # Django stores timestamps in SQLite in UTC without a zone offset,
+        # formatted like str(datetime), which omits zero microseconds
+        array = pc.cast(pc.cast(array, pa.timestamp("us"), safe=False), pa.string())
+        array = pc.replace_substring_regex(array, r"\.000000$", "")
+    elif pa.types.is_date(array.type):
+        array = pc.cast(array, pa.string())
+    return array
+
+
+def _sqlite_load_dataframe(
+    df: pd.DataFrame,
+    table_name: str,
+    if_exists: Literal["fail", "replace", "append"],
+    rebuild_indexes: bool = False,
+) -> None:
+    """Load a DataFrame into a SQLite table with `executemany` of one prepared INSERT.
+
+    The rows are bound in batches of `SQLITE_BATCH_SIZE` from arrow arrays, so no SQL
+    is built or parsed per row or chunk. If `rebuild_indexes`, the secondary indexes
+    of the table are dropped before and re-created after the load.
+    """
+    import time
 
-        buffer = io.StringIO()
-        df.to_csv(buffer, index=False, header=False, sep="\t", na_rep="\\N")
-        buffer.seek(0)
+    import pyarrow as pa
+    from django.db import connection
+    from lamin_utils import logger
+
+    columns = [_sqlite_column(df[name]) for name in df.columns]
+    column_names = ", ".join(f'"{name}"' for name in df.columns)
+    placeholders = ", ".join("?" * len(df.columns))
+    query = f'INSERT INTO "{table_name}" ({column_names}) VALUES ({placeholders})'
+
+    start = time.perf_counter()
+    with transaction.atomic():
+        connection.ensure_connection()
+        cursor = connection.connection.cursor()
+        try:
+            if if_exists == "replace":
+                cursor.execute(f'DELETE FROM "{table_name}"')
+            elif if_exists == "fail":
+                cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
+                if cursor.fetchone()[0] > 0:
+                    raise ValueError(f"Table {table_name} already contains data")
+            indexes = []
+            if rebuild_indexes:
+                # indexes of PRIMARY KEY and UNIQUE constraints have no sql
+                indexes = cursor.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index'"
+                    " AND tbl_name = ? AND sql IS NOT NULL",
+                    (table_name,),
+                ).fetchall()
+                for name, _ in indexes:
+                    cursor.execute(f'DROP INDEX "{name}"')
+            for offset in range(0, len(df), SQLITE_BATCH_SIZE):
+                batch = [
+                    column[offset : offset + SQLITE_BATCH_SIZE] for column in columns
+                ]
+                cursor.executemany(
+                    query,
+                    zip(
+                        *(
+                            values.to_pylist()
+                            if isinstance(values, pa.Array)
+                            else values
+                            for values in batch
+                        ),
+                        strict=True,
+                    ),
+                )
+            for _, sql in indexes:
+                cursor.execute(sql)
+        finally:
+            cursor.close()
+    duration = time.perf_counter() - start
+    logger.debug(
+        f"loaded {len(df)} rows into {table_name} in {duration:.2f}s"
+        f" ({len(df) / max(duration, 1e-9):.0f} rows/s)"
+    )
+
+
+def _copy_from_pipe(cursor, query: str, write) -> None:
+    """Run `COPY ... FROM STDIN` with the data that `write` writes into a pipe.
+
+    `write` runs in a writer thread and `copy_expert` reads from the pipe in the
+    calling thread, so the data of the whole table is never held in memory.
+    """
+    read_fd, write_fd = os.pipe()
+    writer_error: list[BaseException] = []
+
+    def write_to_pipe():
+        try:
+            with os.fdopen(write_fd, "wb") as sink:
+                write(sink)
+        except Exception as e:
+            # copy_expert would otherwise commit the rows before the error
+            writer_error.append(e)
+
+    writer_thread = threading.Thread(target=write_to_pipe, daemon=True)
+    writer_thread.start()
+    try:
+        # closing the read end makes a writer that is blocked on the pipe fail
+        with os.fdopen(read_fd, "rb") as source:
+            cursor.copy_expert(query, source)
+    except BaseException:
+        writer_thread.join()
+        if writer_error:
+            raise writer_error[0] from None
+        raise
+    writer_thread.join()
+    if writer_error:
+        raise writer_error[0]
+
+
+def _copy_dataframe_to_table(cursor, df: pd.DataFrame, table_name: str) -> None:
+    """Stream a DataFrame as CSV into a PostgreSQL table.
+
+    The CSV is formatted `COPY_CSV_CHUNK_ROWS` rows at a time.
+    """
+    column_names = ", ".join(f'"{col}"' for col in df.columns)
+
+    def write_csv(sink):
+        with io.TextIOWrapper(sink, encoding="utf-8", newline="") as text_sink:
+            df.to_csv(
+                text_sink,
+                index=False,
+                header=False,
+                sep="\t",
+                na_rep="\\N",
+                chunksize=COPY_CSV_CHUNK_ROWS,
+            )
 
+    _copy_from_pipe(
+        cursor,
+        f"COPY \"{table_name}\" ({column_names}) FROM STDIN WITH (FORMAT CSV, DELIMITER E'\\t', NULL '\\N')",
+        write_csv,
+    )
+
+
+def _copy_dataframe_to_table_binary(cursor, df: pd.DataFrame, table_name: str) -> bool:
+    """Stream a DataFrame in the binary COPY format into a PostgreSQL table.
+
+    The values are encoded from arrow arrays into the binary representation of the
+    column types of the table, which PostgreSQL doesn't need to parse. Returns `False`
+    without copying anything if a column can't be converted to arrow or has a type
+    that the encoder doesn't support.
+    """
+    import pyarrow as pa
+
+    from ._pg_copy import SUPPORTED_TYPES, encode_table
+
+    cursor.execute(
+        "SELECT attname, format_type(atttypid, NULL) FROM pg_attribute"
+        " WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped",
+        [f'"{table_name}"'],
+    )
+    column_types = dict(cursor.fetchall())
+    pg_types = [column_types.get(col) for col in df.columns]
+    if any(pg_type not in SUPPORTED_TYPES for pg_type in pg_types):
+        return False
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # columns with mixed types, e.g. NOT NULL columns filled with "" on append
+        return False
+    column_names = ", ".join(f'"{col}"' for col in df.columns)
+
+    def write_binary(sink):
+        for chunk in encode_table(table, pg_types):  # type: ignore[arg-type]
+            sink.write(chunk)
+
+    _copy_from_pipe(
+        cursor,
+        f'COPY "{table_name}" ({column_names}) FROM STDIN WITH (FORMAT binary)',
+        write_binary,
+    )
+    return True
+
+
+def _write_registry_dataframe(
+    df: pd.DataFrame,
+    table_name: str,
+    if_exists: Literal["fail", "replace", "append"],
+    copy_format: Literal["csv", "binary"] = "csv",
+) -> None:
+    from django.db import connection
+
+    if connection.vendor == "postgresql":
         with connection.cursor() as cursor:
             if if_exists == "replace":
                 cursor.execute(f'DELETE FROM "{table_name}"')
@@ -321,32 +1421,182 @@ def _import_registry(
                 cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
                 if cursor.fetchone()[0] > 0:
                     raise ValueError(f"Table {table_name} already contains data")
+            if copy_format != "binary" or not _copy_dataframe_to_table_binary(
+                cursor, df, table_name
+            ):
+                _copy_dataframe_to_table(cursor, df, table_name)
+    else:
+        _sqlite_load_dataframe(
+            df,
+            table_name,
+            if_exists,
+            rebuild_indexes=len(df) >= SQLITE_REBUILD_INDEXES_MIN_ROWS,
+        )
 
-            cursor.copy_expert(
-                f"COPY \"{table_name}\" ({column_names}) FROM STDIN WITH (FORMAT CSV, DELIMITER E'\\t', NULL '\\N')",
-                buffer,
+
+def _apply_delta(
+    df: pd.DataFrame,
+    registry: type[models.Model],
+    table_name: str,
+    copy_format: Literal["csv", "binary"] = "csv",
+) -> None:
+    """Upsert the rows of a delta export by deleting and re-inserting them."""
+    from django.db import connection
+
+    pk_column = registry._meta.pk.column  # type: ignore[union-attr]
+    ids = df[pk_column].tolist()
+    with connection.cursor() as cursor:
+        # stay under the variable limit of SQLite
+        for start in range(0, len(ids), 900):
+            batch = ids[start : start + 900]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                f'DELETE FROM "{table_name}" WHERE "{pk_column}" IN ({placeholders})',
+                batch,
             )
-    else:
-        num_cols = len(df.columns)
-        max_vars = 900  # SQLite has a limit of 999 variables per statement
-        chunksize = max(1, max_vars // num_cols)
+    _write_registry_dataframe(df, table_name, "append", copy_format)
 
-        # Always use append mode since we set up the tables from a fresh instance
-        df.to_sql(
-            table_name,
-            connection.connection,
-            if_exists=if_exists,
-            index=False,
-            method="multi",
-            chunksize=chunksize,
+
+def _read_registry_files(
+    registry: type[models.Model],
+    directory: UPath,
+    if_exists: Literal["fail", "replace", "append"] = "replace",
+    manifest_tables: dict | None = None,
+) -> tuple[pd.DataFrame, list[pd.DataFrame]] | None:
+    """Read the parquet file of a registry and the delta files of incremental exports.
+
+    Returns `None` if there is nothing to import for the registry.
+    """
+    table_name = registry._meta.db_table
+    parquet_file = directory / f"{table_name}.parquet"
+    delta_files = []
+    if manifest_tables is not None:
+        # an export manifest lists the exported tables
+        if table_name not in manifest_tables:
+            return None
+        entry = manifest_tables[table_name]
+        parquet_file = directory / entry["file"]
+        delta_files = [directory / delta["file"] for delta in entry.get("deltas", [])]
+
+    if not parquet_file.exists():
+        return None
+    return (
+        _read_registry_parquet(parquet_file, registry, if_exists),
+        [
+            _read_registry_parquet(delta_file, registry, if_exists)
+            for delta_file in delta_files
+        ],
+    )
+
+
+def _import_registry(
+    registry: type[models.Model],
+    directory: UPath,
+    if_exists: Literal["fail", "replace", "append"] = "replace",
+    manifest_tables: dict | None = None,
+    data: tuple[pd.DataFrame, list[pd.DataFrame]] | None = None,
+    copy_format: Literal["csv", "binary"] = "csv",
+) -> None:
+    """Import a single registry table from parquet.
+
+    For PostgreSQL, uses COPY FROM which bypasses SQL parsing and writes directly to
+    table pages (20-50x faster than multi-row INSERTs). With `copy_format="binary"`,
+    the values are sent in their binary representation instead of as CSV text.
+
+    For SQLite, binds the rows to one prepared INSERT with `executemany`, which
+    avoids building and parsing a multi-row INSERT statement per chunk.
+
+    If the export manifest lists delta files of incremental exports for the table,
+    they are applied in order after the base file.
+
+    `data` are the files read ahead by `_read_registry_files`, they are read here
+    if not passed.
+    """
+    from django.db import connection
+
+    table_name = registry._meta.db_table
+    if data is None:
+        data = _read_registry_files(registry, directory, if_exists, manifest_tables)
+        if data is None:
+            return
+    df, delta_dfs = data
+    if not df.empty:
+        if if_exists == "append":
+            # Clear existing data before import
+            # When appending we would run into duplicate errors because of existing values like branches etc
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM "{table_name}"')
+        _write_registry_dataframe(df, table_name, if_exists, copy_format)
+
+    for delta_df in delta_dfs:
+        if not delta_df.empty:
+            _apply_delta(delta_df, registry, table_name, copy_format)
+
+
+def _read_ahead(func, items: list, max_workers: int):
+    """Yield `(item, func(item))` in order while the next items are processed in threads.
+
+    At most `max_workers` results are computed ahead of the consumer.
+    """
+    from collections import deque
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = deque(
+            (item, executor.submit(func, item)) for item in items[:max_workers]
+        )
+        next_items = iter(items[max_workers:])
+        while futures:
+            item, future = futures.popleft()
+            result = future.result()
+            if (next_item := next(next_items, None)) is not None:
+                futures.append((next_item, executor.submit(func, next_item)))
+            yield item, result
+
+
+def _verify_export(manifest: dict, directory: UPath, module_names: list[str]) -> None:
+    """Check the exported files against the export manifest."""
+    from lamin_utils import logger
+
+    from ._migrate import migrate
+
+    for entry in manifest["tables"].values():
+        if entry["registry"].split(".")[0] not in module_names:
+            continue
+        for file_entry in (entry, *entry.get("deltas", [])):
+            path = directory / file_entry["file"]
+            if not path.exists():
+                raise ValueError(
+                    f"{path} is listed in the export manifest but is missing"
+                )
+            size, hash, _ = _file_hash(path)
+            if size != file_entry["size"] or hash != file_entry["hash"]:
+                raise ValueError(
+                    f"{path} doesn't match the export manifest, the export is corrupted"
+                    " or incomplete"
+                )
+    deployed = migrate.deployed_migrations(latest=True)
+    mismatched = {
+        app: name
+        for app, name in manifest["migrations"].items()
+        if app in module_names and deployed.get(app) != name
+    }
+    if mismatched:
+        logger.warning(
+            f"the export was created at migrations {mismatched} but the instance is at"
+            f" { ({app: deployed.get(app) for app in mismatched}) }"
         )
 
 
 def import_db(
     module_names: Iterable[str] | None = None,
     *,
-    input_dir: str | Path = "./lamindb_export/",
+    input_dir: AnyPathStr = "./lamindb_export/",
     if_exists: Literal["fail", "replace", "append"] = "replace",
+    verify: bool = True,
+    resume: bool = False,
+    max_workers: int = 4,
+    max_connections: int = 1,
+    copy_format: Literal["csv", "binary"] = "csv",
 ) -> None:
     """Import registry and link tables from parquet files.
 
@@ -357,38 +1607,122 @@ def import_db(
     to ensure all SQLite writes are flushed to disk before process termination.
 
     Args:
-        input_dir: Directory containing parquet files to import.
+        input_dir: Directory containing parquet files to import, a local or a cloud path.
         module_names: Module names to import (e.g., ["lamindb", "bionty", "pertdb"]).
         if_exists: How to behave if table exists: 'fail', 'replace', or 'append'.
-            If set to 'replace', existing data is deleted and new data is imported. All PKs and indices are not guaranteed to be preserved which can lead to write errors.
+            If set to 'replace', existing data is deleted and new data is imported.
             If set to 'append', new data is added to existing data without clearing the table. All PKs and indices are preserved allowing write operations but database size will greatly increase.
             If set to 'fail', raises an error if the table contains any data.
+        verify: Whether to check the files against the `export_manifest.json` written
+            by `export_db` before importing them. Ignored if there is no manifest.
+        resume: Commit every table on its own instead of importing all tables in a
+            single transaction and record the imported tables in an
+            `import_checkpoint.json` in `input_dir`. If the import is interrupted,
+            running it again with `resume=True` skips the recorded tables.
+        max_workers: Number of threads that read and convert the parquet files of
+            the next tables while the current ones are written to the database.
+        max_connections: Number of tables that are copied into PostgreSQL concurrently,
+            each on its own connection. If larger than 1, every table is committed on
+            its own instead of importing all tables in a single transaction.
+            Ignored for SQLite, which has a single writer.
+        copy_format: The format of `COPY FROM` for PostgreSQL. `"binary"` sends the
+            values in their binary representation, which PostgreSQL doesn't need to
+            parse. Tables with column types that the binary encoder doesn't support,
+            such as `numeric` or `uuid`, are copied as CSV.
     """
     from django.db import connection
     from rich.progress import Progress
 
     import lamindb_setup as ln_setup
 
-    directory = Path(input_dir)
+    from .core.upath import create_path
+
+    directory = create_path(input_dir)
 
     if not directory.exists():
         raise ValueError(f"Directory does not exist: {directory}")
 
+    manifest_file = directory / MANIFEST_FILENAME
+    manifest = json.loads(manifest_file.read_text()) if manifest_file.exists() else None
+
     if module_names is None:
-        parquet_files = list(directory.glob("*.parquet"))
-        detected_modules = {
-            f.name.split("_")[0] for f in parquet_files if "_" in f.name
-        }
-        module_names = sorted(detected_modules)
+        if manifest is not None:
+            module_names = manifest["modules"]
+        else:
+            parquet_files = list(directory.glob("*.parquet"))
+            detected_modules = {
+                f.name.split("_")[0] for f in parquet_files if "_" in f.name
+            }
+            module_names = sorted(detected_modules)
+    module_names = list(module_names)
 
-    modules = {name: _get_registries(name) for name in module_names}
-    total_models = sum(len(models) for models in modules.values())
+    if manifest is not None and verify:
+        _verify_export(manifest, directory, module_names)
+    manifest_tables = manifest["tables"] if manifest is not None else None
 
+    # explicit through models are registries themselves, every table is imported once
+    registries: dict[str, type[models.Model]] = {}
+    for module_name in module_names:
+        schema_module = _import_schema_module(module_name)
+        for model_name in _get_registries(module_name):
+            registry = getattr(schema_module.models, model_name)
+            registries.setdefault(registry._meta.db_table, registry)
+            for field in registry._meta.many_to_many:
+                link_orm = getattr(registry, field.name).through
+                registries.setdefault(link_orm._meta.db_table, link_orm)
+
+    checkpoint_path = directory / IMPORT_CHECKPOINT_FILENAME
+    checkpoint = {
+        "instance": ln_setup.settings.instance.slug,
+        "modules": module_names,
+        "tables": [],
+    }
+    if resume:
+        previous_checkpoint = _read_checkpoint(checkpoint_path, checkpoint)
+        if previous_checkpoint is not None:
+            checkpoint["tables"] = previous_checkpoint["tables"]
+    pending = [
+        registry
+        for table_name, registry in registries.items()
+        if table_name not in checkpoint["tables"]
+    ]
+
+    is_postgres = ln_setup.settings.instance.dialect == "postgresql"
     is_sqlite = ln_setup.settings.instance.dialect == "sqlite"
+    concurrent = is_postgres and max_connections > 1
+    # in resume mode and with concurrent connections, every table is committed on its own
+    per_table_transactions = resume or concurrent
+
+    def read_registry(registry: type[models.Model]):
+        return _read_registry_files(registry, directory, if_exists, manifest_tables)
+
+    def import_registry(registry: type[models.Model], data) -> None:
+        with transaction.atomic() if per_table_transactions else nullcontext():
+            if per_table_transactions and is_postgres:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+            _import_registry(
+                registry, directory, if_exists, manifest_tables, data, copy_format
+            )
+
+    def import_registry_on_own_connection(registry: type[models.Model], data) -> None:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SET session_replication_role = 'replica'")
+            import_registry(registry, data)
+        finally:
+            # every table runs on a pool thread with its own connection
+            connection.close()
+
+    def finish(registry: type[models.Model], progress: Progress, task) -> None:
+        if resume:
+            checkpoint["tables"].append(registry._meta.db_table)
+            _write_checkpoint(checkpoint_path, checkpoint)
+        progress.advance(task)
 
     try:
         with connection.cursor() as cursor:
-            if ln_setup.settings.instance.dialect == "postgresql":
+            if is_postgres:
                 cursor.execute("SET session_replication_role = 'replica'")
             elif is_sqlite:
                 cursor.execute("PRAGMA foreign_keys = OFF")
@@ -399,25 +1733,62 @@ def import_db(
                 # 64MB page cache for better performance on large imports
                 cursor.execute("PRAGMA cache_size = -64000")
 
-        with transaction.atomic():
-            if ln_setup.settings.instance.dialect == "postgresql":
+        with (
+            transaction.atomic() if not per_table_transactions else nullcontext(),
+            Progress() as progress,
+        ):
+            if not per_table_transactions and is_postgres:
                 with connection.cursor() as cursor:
                     cursor.execute("SET CONSTRAINTS ALL DEFERRED")
 
-            with Progress() as progress:
-                task = progress.add_task("Importing", total=total_models)
-                for module_name, model_names in modules.items():
-                    schema_module = _import_schema_module(module_name)
-                    for model_name in model_names:
-                        progress.update(
-                            task, description=f"[cyan]{module_name}.{model_name}"
-                        )
-                        registry = getattr(schema_module.models, model_name)
-                        _import_registry(registry, directory, if_exists=if_exists)
-                        for field in registry._meta.many_to_many:
-                            link_orm = getattr(registry, field.name).through
-                            _import_registry(link_orm, directory, if_exists=if_exists)
-                        progress.advance(task)
+            task = progress.add_task(
+                "Importing",
+                total=len(registries),
+                completed=len(registries) - len(pending),
+            )
+            # the next tables are read and converted while the current ones are written
+            tables = _read_ahead(read_registry, pending, max_workers)
+            if not concurrent:
+                for registry, data in tables:
+                    progress.update(
+                        task, description=f"[cyan]{registry._meta.db_table}"
+                    )
+                    if data is not None:
+                        import_registry(registry, data)
+                    finish(registry, progress, task)
+            else:
+                with ThreadPoolExecutor(max_workers=max_connections) as executor:
+                    running: dict = {}
+
+                    def finish_completed(return_when) -> None:
+                        done, _ = wait(running, return_when=return_when)
+                        errors = []
+                        for future in done:
+                            registry = running.pop(future)
+                            if (error := future.exception()) is not None:
+                                errors.append(error)
+                            else:
+                                finish(registry, progress, task)
+                        if errors:
+                            # the tables that are still running finish before this
+                            # is raised as the executor waits for them
+                            raise errors[0]
+
+                    for registry, data in tables:
+                        if data is None:
+                            finish(registry, progress, task)
+                            continue
+                        running[
+                            executor.submit(
+                                import_registry_on_own_connection, registry, data
+                            )
+                        ] = registry
+                        # bound the number of tables held in memory
+                        if len(running) >= max_connections:
+                            finish_completed(FIRST_COMPLETED)
+                    finish_completed(ALL_COMPLETED)
+        if resume:
+            checkpoint_path.unlink(missing_ok=True)
     finally:
         with connection.cursor() as cursor:
             if ln_setup.settings.instance.dialect == "postgresql":
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+
+import psutil
+import pytest
+from lamindb_setup.core._cache_lock import lock_cache_entry, lock_path, partial_path
+from lamindb_setup.core._cache_manager import close_cache_manager
+from lamindb_setup.core._settings import SetupPaths
+from lamindb_setup.core.upath import UPath
+
+
+def test_lock_cache_entry_single_flight(tmp_path):
+    path = tmp_path / "file"
+    downloads, reused = [], []
+
+    def cloud_to_local():
+        with lock_cache_entry(path) as acquired:
+            if acquired:
+                downloads.append(threading.get_ident())
+                time.sleep(0.1)
+                path.write_text("content")
+            else:
+                # the others reuse the file of the holder
+                reused.append(path.read_text())
+
+    threads = [threading.Thread(target=cloud_to_local) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(downloads) == 1
+    assert reused == ["content"] * 7
+    assert path.read_text() == "content"
+    assert not lock_path(path).exists()
+
+
+def test_lock_cache_entry_removes_stale_locks(tmp_path):
+    path = tmp_path / "file"
+    lock = lock_path(path)
+    # a lock that wasn't touched by its holder for too long
+    lock.write_text("other-host:1")
+    os.utime(lock, (time.time() - 120, time.time() - 120))
+    with lock_cache_entry(path, timeout=1) as acquired:
+        assert acquired
+        assert lock.read_text() == f"{socket.gethostname()}:{os.getpid()}"
+    # a lock of a dead process on this host
+    dead_pid = max(psutil.pids()) + 1000
+    lock.write_text(f"{socket.gethostname()}:{dead_pid}")
+    with lock_cache_entry(path, timeout=1) as acquired:
+        assert acquired
+    assert not lock.exists()
+
+
+def test_lock_cache_entry_timeout(tmp_path):
+    path = tmp_path / "file"
+    lock_path(path).write_text("other-host:1")
+    with pytest.raises(TimeoutError):
+        with lock_cache_entry(path, timeout=0.2):
+            pass
+    # the live lock of another holder is kept
+    assert lock_path(path).exists()
+
+
+def test_synchronize_to_renames_complete_files(tmp_path, monkeypatch):
+    origin = UPath("memory://cache-lock-test/file")
+    origin.write_bytes(b"content")
+    destination = tmp_path / "file"
+
+    def fail(*args, **kwargs):
+        partial_path(destination).write_bytes(b"cont")
+        raise ConnectionError("interrupted")
+
+    monkeypatch.setattr(UPath, "download_to", fail, raising=False)
+    with pytest.raises(ConnectionError):
+        origin.synchronize_to(destination)
+    # an interrupted download leaves no file that looks synchronized
+    assert not destination.exists()
+    assert not partial_path(destination).exists()
+    monkeypatch.undo()
+    assert origin.synchronize_to(destination)
+    assert destination.read_bytes() == b"content"
+    assert not partial_path(destination).exists()
+    origin.fs.rm(origin.path)
+
+
+def test_cloud_to_local_retries_the_lock_if_the_holder_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("LAMIN_CACHE_DIR", str(tmp_path / "cache"))
+    lock = threading.Lock()
+    active, max_active, downloads, errors = [0], [0], [], []
+
+    def fake_sync(self, destination, **kwargs):
+        with lock:
+            active[0] += 1
+            max_active[0] = max(max_active[0], active[0])
+            downloads.append(destination)
+        try:
+            time.sleep(0.2)
+            if len(downloads) == 1:
+                raise ConnectionError("interrupted")
+            destination.write_bytes(b"content")
+            return True
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(UPath, "synchronize_to", fake_sync, raising=False)
+
+    def cloud_to_local():
+        try:
+            SetupPaths.cloud_to_local("s3://bucket/uid/file.txt")
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=cloud_to_local) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # after the failure of the holder, one waiter downloads and the other reuses
+    assert len(errors) == 1
+    assert len(downloads) == 2
+    assert max_active[0] == 1
+    close_cache_manager()
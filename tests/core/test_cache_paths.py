@@ -1,5 +1,16 @@
+import os
+import time
+from pathlib import Path
+
 import pytest
 from lamindb_setup import settings
+from lamindb_setup.core._cache_lock import lock_path
+from lamindb_setup.core._cache_manager import (
+    CacheManager,
+    close_cache_manager,
+    get_cache_manager,
+    parse_size,
+)
 from lamindb_setup.core._settings import SetupPaths
 from lamindb_setup.core.upath import UPath
 
@@ -63,3 +74,193 @@ def test_upath_cache_cloud_path(monkeypatch):
             (settings.cache_dir / "bucket/uid/file.txt").as_posix(),
         )
     ]
+
+
+def _write(path, n_bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * n_bytes)
+    return path
+
+
+def test_cache_manager_lru_eviction(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = CacheManager(cache_dir, max_size=250)
+    paths = [_write(cache_dir / f"bucket/file_{i}", 100) for i in range(3)]
+    for path in paths:
+        cache.record_access(path, downloaded=True)
+    # access the oldest entry so that the second one is evicted
+    cache.record_access(paths[0], downloaded=False)
+    assert cache.enforce(keep=[paths[2]]) == ["bucket/file_1"]
+    assert not paths[1].exists()
+    assert paths[0].exists() and paths[2].exists()
+    stats = cache.stats()
+    assert stats["size"] == 200
+    assert stats["hits"] == 1 and stats["misses"] == 3
+    assert stats["hit_rate"] == 0.25
+    assert stats["bytes_saved"] == 100
+    assert stats["n_evictions"] == 1
+    cache.close()
+
+
+def test_cache_manager_lfu_and_pins(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = CacheManager(cache_dir, max_size=250, policy="lfu")
+    directory = cache_dir / "bucket/store.zarr"
+    _write(directory / "0.0", 50)
+    _write(directory / "0.1", 50)
+    cache.record_access(directory, downloaded=True)
+    # a file in a cached directory is tracked by the entry of the directory
+    cache.record_access(directory / "0.0", downloaded=False)
+    file_a = _write(cache_dir / "bucket/file_a", 100)
+    for downloaded in (True, False, False):
+        cache.record_access(file_a, downloaded=downloaded)
+    file_b = _write(cache_dir / "bucket/file_b", 100)
+    cache.record_access(file_b, downloaded=True)
+    assert cache.stats()["n_entries"] == 3
+    # the least frequently used entry is evicted although it is the most recent one
+    with cache.pinned(directory / "0.1"):
+        assert cache.enforce() == ["bucket/file_b"]
+    file_c = _write(cache_dir / "bucket/file_c", 100)
+    cache.record_access(file_c, downloaded=True)
+    with cache.pinned(file_c):
+        assert cache.enforce() == ["bucket/store.zarr"]
+    assert not directory.exists()
+    assert file_a.exists() and file_c.exists()
+    cache.close()
+
+
+def test_cache_manager_skips_locked_entries(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = CacheManager(cache_dir, max_size=0)
+    for name in ["locked", "stale", "unlocked"]:
+        _write(cache_dir / f"bucket/{name}", 10)
+        cache.record_access(cache_dir / f"bucket/{name}", downloaded=True)
+    # another process synchronizes the entry
+    lock_path(cache_dir / "bucket/locked").write_text("other-host:1")
+    stale_lock = lock_path(cache_dir / "bucket/stale")
+    stale_lock.write_text("other-host:1")
+    os.utime(stale_lock, (time.time() - 120, time.time() - 120))
+    assert sorted(cache.enforce()) == ["bucket/stale", "bucket/unlocked"]
+    assert (cache_dir / "bucket/locked").exists()
+    cache.close()
+
+
+def test_cache_manager_registers_existing_files(tmp_path):
+    cache_dir = tmp_path / "cache"
+    _write(cache_dir / "bucket/old_file", 100)
+    cache = CacheManager(cache_dir, max_size=0)
+    assert cache.stats()["size"] == 100
+    assert cache.enforce() == ["bucket/old_file"]
+    # empty parent directories are removed as well
+    assert not (cache_dir / "bucket").exists()
+    cache.close()
+
+
+def test_cache_manager_registers_existing_directories_as_entries(tmp_path):
+    cache_dir = tmp_path / "cache"
+    _write(cache_dir / "bucket/store.zarr/0.0", 100)
+    _write(cache_dir / "bucket/store.zarr/.zarray", 10)
+    _write(cache_dir / "bucket/data/folder/file.csv", 20)
+    # the leftovers of an interrupted download aren't entries
+    _write(cache_dir / "bucket/data/large.h5ad.partial", 50)
+    _write(cache_dir / "bucket/data/large.h5ad.partial.state.json", 5)
+    _write(cache_dir / "bucket/data/large.h5ad.lock", 5)
+    cache = CacheManager(cache_dir, max_size=0)
+    assert cache.stats()["size"] == 130
+    # a store is evicted as a whole, not chunk by chunk
+    assert sorted(cache.enforce()) == [
+        "bucket/data/folder/file.csv",
+        "bucket/store.zarr",
+    ]
+    assert not (cache_dir / "bucket/store.zarr").exists()
+    assert (cache_dir / "bucket/data/large.h5ad.partial").exists()
+    cache.close()
+
+
+def test_cloud_to_local_enforces_cache_max_size(tmp_path, monkeypatch):
+    monkeypatch.setenv("LAMIN_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("LAMIN_CACHE_MAX_SIZE", "150B")
+
+    def fake_sync(self, destination, **kwargs):
+        destination.write_bytes(b"x" * 100)
+        return True
+
+    monkeypatch.setattr(UPath, "synchronize_to", fake_sync, raising=False)
+    first = SetupPaths.cloud_to_local("s3://bucket/uid/first.txt")
+    second = SetupPaths.cloud_to_local("s3://bucket/uid/second.txt")
+    assert not first.exists()
+    assert second.exists()
+    assert get_cache_manager().stats()["n_evictions"] == 1
+    close_cache_manager()
+
+
+def test_parse_size():
+    assert parse_size("50GB") == 50 * 1000**3
+    assert parse_size("1.5 MiB") == int(1.5 * 1024**2)
+    assert parse_size("1024") == 1024
+    assert parse_size("null") is None
+    with pytest.raises(ValueError):
+        parse_size("50 parsecs")
+
+
+def test_synchronize_to_uses_cache_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("LAMIN_CACHE_DIR", str(tmp_path / "cache"))
+    origin = UPath("memory://cache-index-test/store")
+    fs = origin.fs
+    fs.pipe_file(f"{origin.path}/a.txt", b"aaa")
+    fs.pipe_file(f"{origin.path}/sub/b.txt", b"bb")
+
+    local_dir = SetupPaths.cloud_to_local(origin, cache_key="store")
+    assert (local_dir / "sub/b.txt").read_bytes() == b"bb"
+    indexed = get_cache_manager().indexed_files(local_dir)
+    assert {path.relative_to(local_dir).as_posix() for path in indexed} == {
+        "a.txt",
+        "sub/b.txt",
+    }
+    assert get_cache_manager().stats()["size"] == 5
+
+    # the freshness of an indexed directory is decided without a local scan
+    def no_scan(self, pattern):
+        raise AssertionError("the local directory was scanned")
+
+    monkeypatch.setattr(Path, "rglob", no_scan)
+    assert not origin.synchronize_to(local_dir, just_check=True)
+    fs.pipe_file(f"{origin.path}/a.txt", b"aaaa")
+    fs.rm(f"{origin.path}/sub/b.txt")
+    assert origin.synchronize_to(local_dir, just_check=True)
+    assert origin.synchronize_to(local_dir)
+    assert (local_dir / "a.txt").read_bytes() == b"aaaa"
+    assert not (local_dir / "sub").exists()
+    indexed = get_cache_manager().indexed_files(local_dir)
+    assert list(indexed) == [local_dir / "a.txt"]
+    assert indexed[local_dir / "a.txt"].st_size == 4
+    fs.rm(origin.path, recursive=True)
+    close_cache_manager()
+
+
+def test_synchronize_to_restores_locally_deleted_indexed_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("LAMIN_CACHE_DIR", str(tmp_path / "cache"))
+    origin = UPath("memory://cache-index-deleted-test/store")
+    fs = origin.fs
+    fs.pipe_file(f"{origin.path}/a.txt", b"aaa")
+    fs.pipe_file(f"{origin.path}/b.txt", b"bb")
+
+    local_dir = SetupPaths.cloud_to_local(origin, cache_key="store")
+    # the files of unchanged folders aren't checked one by one
+    path_exists = Path.exists
+
+    def exists(self):
+        assert self.parent != local_dir, "an indexed file was checked"
+        return path_exists(self)
+
+    monkeypatch.setattr(Path, "exists", exists)
+    assert not origin.synchronize_to(local_dir, just_check=True)
+    monkeypatch.setattr(Path, "exists", path_exists)
+    (local_dir / "b.txt").unlink()
+    assert origin.synchronize_to(local_dir, just_check=True)
+    assert origin.synchronize_to(local_dir)
+    assert (local_dir / "b.txt").read_bytes() == b"bb"
+    indexed = get_cache_manager().indexed_files(local_dir)
+    assert set(indexed) == {local_dir / "a.txt", local_dir / "b.txt"}
+    fs.rm(origin.path, recursive=True)
+    close_cache_manager()
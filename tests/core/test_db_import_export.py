@@ -4,7 +4,13 @@ from typing import TYPE_CHECKING
 
 import pandas as pd
 import pytest
-from lamindb_setup.io import _get_registries, export_db, import_db
+from lamindb_setup.io import (
+    _get_registries,
+    _id_ranges,
+    _normalize_table,
+    export_db,
+    import_db,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Generator
@@ -144,6 +150,355 @@ def test_exportdb_exports_link_tables(
     assert len(link_tables) > 0
 
 
+def test_exportdb_chunked_table_single_file(
+    simple_instance: Callable, cleanup_export_dir: Path
+):
+    import lamindb as ln
+    import pyarrow.parquet as pq
+
+    ulabels = ln.ULabel.objects.bulk_create(
+        [ln.ULabel(name=f"chunked_label_{i}") for i in range(25)]
+    )
+    n_ulabels = ln.ULabel.objects.count()
+
+    export_db(module_names=["lamindb"], output_dir=cleanup_export_dir, chunk_size=10)
+
+    ulabel_file = cleanup_export_dir / "lamindb_ulabel.parquet"
+    assert not list(cleanup_export_dir.glob("*_chunk_*"))
+    assert pq.read_metadata(ulabel_file).num_row_groups == -(-n_ulabels // 10)
+    ulabel_df = pd.read_parquet(ulabel_file)
+    assert len(ulabel_df) == n_ulabels
+    assert ulabel_df["id"].is_monotonic_increasing
+    chunked = ulabel_df["name"].str.startswith("chunked_label_")
+    assert chunked.sum() == 25
+    assert ulabel_df.loc[chunked, "description"].isna().all()
+
+    ln.ULabel.objects.filter(id__in=[ulabel.id for ulabel in ulabels]).delete()
+
+
+def test_exportdb_sharded_table(
+    simple_instance: Callable, cleanup_export_dir: Path, monkeypatch
+):
+    import lamindb as ln
+    import lamindb_setup as ln_setup
+    from django.db import connection
+    from lamindb_setup import io
+
+    if ln_setup.settings.instance.dialect != "postgresql":
+        pytest.skip("only large PostgreSQL tables are split into shards")
+    ulabels = ln.ULabel.objects.bulk_create(
+        [ln.ULabel(name=f"sharded_label_{i}") for i in range(5000)]
+    )
+    with connection.cursor() as cursor:
+        # the shards are planned from the row estimate of the statistics
+        cursor.execute("ANALYZE lamindb_ulabel")
+    n_ulabels = ln.ULabel.objects.count()
+    monkeypatch.setattr(io, "SHARD_SIZE", 1000)
+    shards = []
+    copy_shard = io._copy_shard_to_parquet_writer
+
+    def record_shard(table_name, key, id_range, *args):
+        if table_name == "lamindb_ulabel":
+            shards.append(id_range)
+        copy_shard(table_name, key, id_range, *args)
+
+    monkeypatch.setattr(io, "_copy_shard_to_parquet_writer", record_shard)
+
+    export_db(
+        module_names=["lamindb"],
+        output_dir=cleanup_export_dir,
+        max_workers=2,
+        max_connections=4,
+    )
+
+    assert len(shards) == -(-n_ulabels // 1000)
+    ulabel_df = pd.read_parquet(cleanup_export_dir / "lamindb_ulabel.parquet")
+    # every row is exported exactly once
+    assert len(ulabel_df) == n_ulabels
+    assert ulabel_df["id"].is_unique
+    assert set(ulabel_df["id"]) == set(ln.ULabel.objects.values_list("id", flat=True))
+
+    ln.ULabel.objects.filter(id__in=[ulabel.id for ulabel in ulabels]).delete()
+
+
+def test_exportdb_preserves_field_types(
+    simple_instance: Callable, cleanup_export_dir: Path
+):
+    import json
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from lamindb_setup.io import EXPORT_SCHEMA_METADATA_KEY
+
+    export_db(module_names=["lamindb"], output_dir=cleanup_export_dir)
+
+    schema = pq.read_schema(cleanup_export_dir / "lamindb_feature.parquet")
+    assert schema.field("id").type == pa.int64()
+    assert schema.field("is_type").type == pa.bool_()
+    assert schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+    assert schema.field("uid").type == pa.string()
+    field_types = json.loads(schema.metadata[EXPORT_SCHEMA_METADATA_KEY.encode()])
+    assert field_types["created_at"] == "DateTimeField"
+
+
+def test_exportdb_exports_unparseable_columns_as_text(
+    simple_instance: Callable, tmp_path: Path
+):
+    import sqlite3
+
+    import lamindb as ln
+    import lamindb_setup as ln_setup
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from lamindb_setup.io import _select_table_to_parquet
+
+    if ln_setup.settings.instance.dialect != "sqlite":
+        pytest.skip("only SQLite stores values that don't match the column type")
+    ulabel = ln.ULabel(name="unparseable_label").save()
+    db_path = tmp_path / "instance.db"
+    source = sqlite3.connect(ln_setup.settings.instance.db.removeprefix("sqlite:///"))
+    target = sqlite3.connect(db_path)
+    source.backup(target)
+    source.close()
+    target.execute(
+        "UPDATE lamindb_ulabel SET created_at = 'not a timestamp'"
+        " WHERE name = 'unparseable_label'"
+    )
+    target.commit()
+    target.close()
+    ulabel.delete(permanent=True)
+
+    path = tmp_path / "lamindb_ulabel.parquet"
+    _select_table_to_parquet(
+        ln.ULabel, db_path.as_posix(), path, chunk_size=1000, row_group_size=1000
+    )
+    table = pq.read_table(path)
+    assert table.schema.field("created_at").type == pa.string()
+    assert "not a timestamp" in table.column("created_at").to_pylist()
+
+
+def test_watermark_of_text_timestamp_column(simple_instance: Callable, tmp_path: Path):
+    from datetime import datetime, timezone
+
+    import lamindb as ln
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from lamindb_setup.io import _watermark, _watermark_columns
+
+    pk_column, updated_at_column = _watermark_columns(ln.ULabel)
+    assert updated_at_column is not None
+    path = tmp_path / "lamindb_ulabel.parquet"
+    # an updated_at column with unparseable values is exported as text
+    table = pa.table(
+        {
+            pk_column: pa.array([1, 2, 3], pa.int64()),
+            updated_at_column: [
+                "2024-05-02 10:00:00.123456",
+                "not a timestamp",
+                "2024-11-30 08:00:00",
+            ],
+        }
+    )
+    pq.write_table(table, path)
+    assert _watermark(ln.ULabel, path) == {
+        "id": 3,
+        "updated_at": datetime(2024, 11, 30, 8, tzinfo=timezone.utc).isoformat(),
+    }
+
+
+def test_exportdb_manifest(simple_instance: Callable, cleanup_export_dir: Path):
+    import json
+
+    import pyarrow.parquet as pq
+
+    export_db(
+        module_names=["lamindb"],
+        output_dir=cleanup_export_dir,
+        compression="zstd",
+        row_group_size=2,
+    )
+
+    manifest = json.loads((cleanup_export_dir / "export_manifest.json").read_text())
+    assert manifest["modules"] == ["lamindb"]
+    assert "lamindb" in manifest["migrations"]
+    entry = manifest["tables"]["lamindb_branch"]
+    parquet_file = cleanup_export_dir / entry["file"]
+    assert entry["registry"] == "lamindb.Branch"
+    assert entry["size"] == parquet_file.stat().st_size
+    metadata = pq.read_metadata(parquet_file)
+    assert entry["n_rows"] == metadata.num_rows
+    assert metadata.num_row_groups == -(-metadata.num_rows // 2)
+    assert metadata.row_group(0).column(0).compression == "ZSTD"
+
+    # a modified file fails the verification before anything is imported
+    with parquet_file.open("ab") as f:
+        f.write(b"corrupted")
+    with pytest.raises(ValueError, match="doesn't match the export manifest"):
+        import_db(input_dir=cleanup_export_dir)
+
+
+def test_exportdb_incremental(simple_instance: Callable, cleanup_export_dir: Path):
+    import json
+    from datetime import timedelta
+
+    import lamindb as ln
+    from django.utils import timezone
+
+    updated = ln.ULabel(name="incremental_label_updated").save()
+    export_db(module_names=["lamindb"], output_dir=cleanup_export_dir)
+    manifest_path = cleanup_export_dir / "export_manifest.json"
+    entry = json.loads(manifest_path.read_text())["tables"]["lamindb_ulabel"]
+    assert entry["watermark"]["id"] == updated.id
+    assert entry["deltas"] == []
+
+    created = ln.ULabel.objects.bulk_create(
+        [ln.ULabel(name=f"incremental_label_{i}") for i in range(3)]
+    )
+    ln.ULabel.objects.filter(id=updated.id).update(
+        description="updated", updated_at=timezone.now() + timedelta(seconds=1)
+    )
+    export_db(module_names=["lamindb"], output_dir=cleanup_export_dir, incremental=True)
+
+    tables = json.loads(manifest_path.read_text())["tables"]
+    assert tables["lamindb_branch"]["deltas"] == []
+    deltas = tables["lamindb_ulabel"]["deltas"]
+    assert [delta["file"] for delta in deltas] == ["lamindb_ulabel.delta-0001.parquet"]
+    delta_df = pd.read_parquet(cleanup_export_dir / deltas[0]["file"])
+    assert set(delta_df["id"]) == {updated.id, *(ulabel.id for ulabel in created)}
+    assert tables["lamindb_ulabel"]["watermark"]["id"] == max(delta_df["id"])
+
+    ln.ULabel.objects.filter(name__startswith="incremental_label_").delete()
+    import_db(input_dir=cleanup_export_dir, if_exists="append")
+    labels = ln.ULabel.objects.filter(name__startswith="incremental_label_")
+    assert labels.count() == 4
+    assert labels.get(id=updated.id).description == "updated"
+
+    # a full export supersedes the deltas
+    export_db(module_names=["lamindb"], output_dir=cleanup_export_dir)
+    assert not list(cleanup_export_dir.glob("*.delta-*.parquet"))
+    labels.delete()
+
+
+def test_exportdb_to_cloud_path(simple_instance: Callable):
+    import json
+
+    import lamindb as ln
+    from lamindb_setup.core.upath import UPath
+
+    output_dir = UPath("memory://lamindb-setup-export/")
+    ulabel = ln.ULabel(name="cloud_export_label").save()
+    export_db(module_names=["lamindb"], output_dir=output_dir)
+
+    manifest = json.loads((output_dir / "export_manifest.json").read_text())
+    entry = manifest["tables"]["lamindb_ulabel"]
+    assert entry["size"] == (output_dir / entry["file"]).stat().st_size
+    assert ulabel.id in set(
+        pd.read_parquet((output_dir / entry["file"]).as_posix())["id"]
+    )
+
+    ulabel.delete(permanent=True)
+    import_db(input_dir=output_dir, if_exists="append")
+    assert ln.ULabel.objects.filter(name="cloud_export_label").count() == 1
+    ln.ULabel.objects.filter(name="cloud_export_label").delete(permanent=True)
+    output_dir.fs.rm(output_dir.path, recursive=True)
+
+
+def test_exportdb_importdb_resume(
+    simple_instance: Callable, cleanup_export_dir: Path, monkeypatch
+):
+    import json
+
+    import lamindb_setup.io as io
+
+    export_full_table = io._export_full_table
+    import_registry = io._import_registry
+
+    def failing_export_full_table(registry_info, *args, **kwargs):
+        if registry_info == ("lamindb", "ULabel", None):
+            raise RuntimeError("interrupted")
+        return export_full_table(registry_info, *args, **kwargs)
+
+    monkeypatch.setattr(io, "_export_full_table", failing_export_full_table)
+    with pytest.raises(RuntimeError, match="interrupted"):
+        export_db(module_names=["lamindb"], output_dir=cleanup_export_dir)
+    checkpoint_path = cleanup_export_dir / "export_checkpoint.json"
+    checkpoint = json.loads(checkpoint_path.read_text())
+    assert "lamindb_branch" in checkpoint["tables"]
+    assert "lamindb_ulabel" not in checkpoint["tables"]
+    assert not (cleanup_export_dir / "export_manifest.json").exists()
+
+    branch_file = cleanup_export_dir / "lamindb_branch.parquet"
+    branch_mtime = branch_file.stat().st_mtime_ns
+    monkeypatch.setattr(io, "_export_full_table", export_full_table)
+    export_db(module_names=["lamindb"], output_dir=cleanup_export_dir, resume=True)
+    assert branch_file.stat().st_mtime_ns == branch_mtime
+    assert not checkpoint_path.exists()
+    manifest = json.loads((cleanup_export_dir / "export_manifest.json").read_text())
+    assert manifest["tables"].keys() == checkpoint["tables"].keys() | {"lamindb_ulabel"}
+
+    def failing_import_registry(registry, *args, **kwargs):
+        if registry._meta.db_table == "lamindb_ulabel":
+            raise RuntimeError("interrupted")
+        return import_registry(registry, *args, **kwargs)
+
+    monkeypatch.setattr(io, "_import_registry", failing_import_registry)
+    with pytest.raises(RuntimeError, match="interrupted"):
+        import_db(input_dir=cleanup_export_dir, if_exists="append", resume=True)
+    checkpoint_path = cleanup_export_dir / "import_checkpoint.json"
+    imported_tables = json.loads(checkpoint_path.read_text())["tables"]
+    assert "lamindb_branch" in imported_tables
+    assert "lamindb_ulabel" not in imported_tables
+
+    imported = []
+
+    def recording_import_registry(registry, *args, **kwargs):
+        imported.append(registry._meta.db_table)
+        return import_registry(registry, *args, **kwargs)
+
+    monkeypatch.setattr(io, "_import_registry", recording_import_registry)
+    import_db(input_dir=cleanup_export_dir, if_exists="append", resume=True)
+    assert "lamindb_ulabel" in imported
+    assert not set(imported) & set(imported_tables)
+    assert not checkpoint_path.exists()
+
+
+def test_normalize_table(simple_instance: Callable):
+    import lamindb as ln
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(
+        pd.DataFrame(
+            {
+                "is_type": ["t", "f", "t"],
+                "nullable": ["f", "", None],
+                "array_size": ["3", "", "x"],
+                "description": ["a", "", None],
+                "array_shape": [[1, 2], None, []],
+                "_aux": [{"a": 1}, None, {"a": 2}],
+            }
+        ),
+        preserve_index=False,
+    )
+    normalized = _normalize_table(table, ln.Feature)
+
+    assert normalized.column("is_type").to_pylist() == [True, False, True]
+    assert normalized.column("nullable").to_pylist() == [False, None, None]
+    assert normalized.column("array_size").to_pylist() == [3, None, None]
+    assert normalized.column("description").to_pylist() == ["a", None, None]
+    assert normalized.column("array_shape").to_pylist() == ["[1, 2]", None, "[]"]
+    assert normalized.column("_aux").to_pylist() == ['{"a": 1}', None, '{"a": 2}']
+
+
+def test_id_ranges():
+    assert _id_ranges(1, 10, 3) == [(None, 4), (5, 8), (9, None)]
+    assert _id_ranges(5, 5, 4) == [(None, None)]
+    ranges = _id_ranges(1, 1_000_003, 7)
+    assert len(ranges) == 7
+    # the ranges are contiguous
+    for (_, end), (start, _) in zip(ranges[:-1], ranges[1:], strict=True):
+        assert start == end + 1
+
+
 def test_exportdb_handles_mixed_null_and_string_values(
     simple_instance: Callable, cleanup_export_dir: Path
 ):
@@ -386,3 +741,57 @@ def test_import_db_converts_numeric_strings(simple_instance: Callable, tmp_path:
     imported = ln.Artifact.get(id=555)
     assert isinstance(imported.size, int)
     assert imported.size == 2048
+
+
+def test_import_db_fails_if_table_contains_data(
+    simple_instance: Callable, tmp_path: Path
+):
+    import lamindb as ln
+
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    pd.DataFrame({"id": [1], "name": ["main"]}).to_parquet(
+        export_dir / "lamindb_branch.parquet", index=False
+    )
+    assert ln.Branch.objects.exists()
+
+    with pytest.raises(ValueError, match="already contains data"):
+        import_db(input_dir=export_dir, module_names=["lamindb"], if_exists="fail")
+
+
+def test_import_db_concurrent_connections(
+    simple_instance: Callable, cleanup_export_dir: Path
+):
+    import lamindb as ln
+
+    ln.ULabel.objects.bulk_create(
+        [ln.ULabel(name=f"concurrent_label_{i}") for i in range(10)]
+    )
+    export_db(module_names=["lamindb"], output_dir=cleanup_export_dir)
+    ln.ULabel.objects.filter(name__startswith="concurrent_label_").delete(
+        permanent=True
+    )
+
+    import_db(
+        input_dir=cleanup_export_dir,
+        if_exists="append",
+        max_workers=2,
+        max_connections=3,
+    )
+    labels = ln.ULabel.objects.filter(name__startswith="concurrent_label_")
+    assert labels.count() == 10
+    labels.delete(permanent=True)
+
+
+def test_import_db_binary_copy(simple_instance: Callable, cleanup_export_dir: Path):
+    import lamindb as ln
+
+    ulabel = ln.ULabel(name="binary_copy_label", description="ünïcödé").save()
+    export_db(module_names=["lamindb"], output_dir=cleanup_export_dir)
+    ulabel.delete(permanent=True)
+
+    import_db(input_dir=cleanup_export_dir, if_exists="append", copy_format="binary")
+    imported = ln.ULabel.get(name="binary_copy_label")
+    assert imported.description == "ünïcödé"
+    assert imported.created_at == ulabel.created_at
+    imported.delete(permanent=True)
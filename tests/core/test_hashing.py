@@ -1,17 +1,31 @@
 from __future__ import annotations
 
 import base64
+import hashlib
+import math
+import random
 from pathlib import Path
 from uuid import UUID
 
+import pytest
+from lamindb_setup.core._hash_cache import HashCache
 from lamindb_setup.core.hashing import (
+    BATCH_MAX_FILES,
+    BLOCK_SIZE,
+    DEFAULT_CHUNK_SIZE,
     HASH_LENGTH,
     b16_to_b64,
     hash_and_encode_as_b62,
     hash_code,
+    hash_codes,
+    hash_dir,
     hash_file,
+    hash_from_hashes_list,
+    hash_multipart,
     hash_string,
+    infer_multipart_part_sizes,
     to_b64_str,
+    validate_multipart_hash,
 )
 
 
@@ -62,3 +76,193 @@ def test_hash_code():
 def test_hash_and_encode_as_b62():
     id = UUID("10075f07-0b0b-48b0-9006-18724fb3be62")
     assert hash_and_encode_as_b62(id.hex) == "7clAMMtTbqlKVQPmUbqnIq"
+
+
+def test_hash_file_cache(tmp_path, monkeypatch):
+    from lamindb_setup.core._hash_cache import get_hash_cache, stat_key
+
+    monkeypatch.setenv("LAMIN_CACHE_DIR", str(tmp_path / "cache"))
+    filepath = tmp_path / "file.txt"
+    filepath.write_text("abc")
+    result = hash_file(filepath, use_cache=True)
+    assert result == hash_file(filepath)
+    key = stat_key(filepath.stat(), DEFAULT_CHUNK_SIZE)
+    assert get_hash_cache().get(key) == result[1:]
+    # a cache hit doesn't read the file
+    get_hash_cache().put(key, "cachedhash", "md5")
+    assert hash_file(filepath, use_cache=True) == (3, "cachedhash", "md5")
+    # a changed file gets a new stat signature
+    filepath.write_text("abcd")
+    assert hash_file(filepath, use_cache=True) == hash_file(filepath)
+
+
+def test_hash_dir_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("LAMIN_CACHE_DIR", str(tmp_path / "cache"))
+    dirpath = tmp_path / "dir"
+    (dirpath / "sub").mkdir(parents=True)
+    for i in range(5):
+        (dirpath / f"file_{i}.txt").write_text(f"content {i}")
+    (dirpath / "sub" / "file.txt").write_text("sub content")
+    expected = hash_dir(dirpath)
+    assert hash_dir(dirpath, use_cache=True) == expected
+    assert hash_dir(dirpath, use_cache=True) == expected
+    (dirpath / "file_0.txt").write_text("changed")
+    changed = hash_dir(dirpath, use_cache=True)
+    assert changed == hash_dir(dirpath)
+    assert changed[1] != expected[1]
+
+
+def test_hash_cache_lru_eviction(tmp_path):
+    cache = HashCache(tmp_path / "hashes.sqlite", max_entries=3)
+    keys = [(1, i, 10, 100, DEFAULT_CHUNK_SIZE) for i in range(4)]
+    for key in keys[:3]:
+        cache.put(key, f"hash{key[1]}", "md5")
+    # access the oldest entry so that the second one is evicted
+    assert cache.get(keys[0]) == ("hash0", "md5")
+    cache.put(keys[3], "hash3", "md5")
+    assert cache.get(keys[1]) is None
+    assert set(cache.get_many(keys)) == {keys[0], keys[2], keys[3]}
+    cache.close()
+
+
+def test_hash_cache_evicts_below_max_entries(tmp_path):
+    path = tmp_path / "hashes.sqlite"
+    cache = HashCache(path, max_entries=20)
+    cache.put_many(
+        ((1, i, 10, 100, DEFAULT_CHUNK_SIZE), f"hash{i}", "md5") for i in range(15)
+    )
+    # the entries of an earlier session are counted on opening the cache
+    cache.close()
+    cache = HashCache(path, max_entries=20)
+    cache.put_many(
+        ((1, i, 10, 100, DEFAULT_CHUNK_SIZE), f"hash{i}", "md5") for i in range(15, 21)
+    )
+    # a tenth more than the excess is evicted
+    keys = [(1, i, 10, 100, DEFAULT_CHUNK_SIZE) for i in range(21)]
+    assert len(cache.get_many(keys)) == 18
+    cache.close()
+
+
+def _hash_file_reference(content: bytes, chunk_size: int | None) -> tuple[str, str]:
+    if chunk_size is None or len(content) <= chunk_size:
+        return to_b64_str(hashlib.md5(content).digest())[:HASH_LENGTH], "md5"
+    digest = hashlib.sha1(
+        hashlib.sha1(content[:chunk_size]).digest()
+        + hashlib.sha1(content[-chunk_size:]).digest()
+    ).digest()
+    return to_b64_str(digest)[:HASH_LENGTH], "sha1-fl"
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_hash_file_streaming_matches_reference(tmp_path, use_mmap):
+    # sizes around the read block size exercise partial and multiple block reads
+    rng = random.Random(0)
+    for file_size in (0, 1, BLOCK_SIZE - 1, BLOCK_SIZE, 2 * BLOCK_SIZE + 17):
+        content = rng.randbytes(file_size)
+        filepath = tmp_path / f"file_{file_size}"
+        filepath.write_bytes(content)
+        for chunk_size in (
+            None,
+            1,
+            BLOCK_SIZE // 2,
+            BLOCK_SIZE + 3,
+            DEFAULT_CHUNK_SIZE,
+        ):
+            size, hash, hash_type = hash_file(
+                filepath, chunk_size=chunk_size, use_mmap=use_mmap
+            )
+            assert size == file_size
+            assert (hash, hash_type) == _hash_file_reference(content, chunk_size)
+
+
+@pytest.mark.parametrize(
+    "n_workers,executor", [(1, "thread"), (4, "thread"), (2, "process")]
+)
+def test_hash_dir_batches(tmp_path, n_workers, executor):
+    dirpath = tmp_path / "dir"
+    # more files than fit into a single batch
+    for i in range(BATCH_MAX_FILES + 10):
+        subdir = dirpath / f"sub_{i % 7}"
+        subdir.mkdir(parents=True, exist_ok=True)
+        (subdir / f"file_{i}.txt").write_text(f"content {i}")
+    files = [path for path in dirpath.rglob("*") if path.is_file()]
+    expected_hash = hash_from_hashes_list(hash_file(file)[1] for file in files)
+    expected_size = sum(file.stat().st_size for file in files)
+
+    size, hash, hash_type, n_files = hash_dir(
+        dirpath, n_workers=n_workers, executor=executor
+    )
+    assert hash == expected_hash
+    assert hash_type == "md5-d"
+    assert size == expected_size
+    assert n_files == len(files)
+
+
+def test_hash_multipart(tmp_path):
+    part_size = 5 * 1024**2
+    content = random.Random(1).randbytes(2 * part_size + 123)
+    filepath = tmp_path / "file"
+    filepath.write_bytes(content)
+    # the etag of an s3 multipart upload is the md5 of the concatenated part md5s
+    parts = [content[i : i + part_size] for i in range(0, len(content), part_size)]
+    etag = hashlib.md5(b"".join(hashlib.md5(p).digest() for p in parts)).hexdigest()
+    size, hash, hash_type = hash_multipart(filepath, part_size, n_workers=2)
+    assert size == len(content)
+    assert hash == b16_to_b64(etag)[:HASH_LENGTH]
+    assert hash_type == "md5-3"
+    assert validate_multipart_hash(filepath, hash, hash_type) == part_size
+    assert validate_multipart_hash(filepath, hash, hash_type, [8 * 1024**2]) is None
+    # a plain upload has the plain md5 of the file
+    assert validate_multipart_hash(filepath, *hash_file(filepath)[1:]) is not None
+
+
+def test_hash_multipart_single_part(tmp_path):
+    # boto3 uploads a file of exactly 8 MiB as a multipart upload with one part
+    content = random.Random(2).randbytes(8 * 1024**2)
+    filepath = tmp_path / "file"
+    filepath.write_bytes(content)
+    etag = hashlib.md5(hashlib.md5(content).digest()).hexdigest()
+    hash = b16_to_b64(etag)[:HASH_LENGTH]
+    assert hash_multipart(filepath, len(content)) == (len(content), hash, "md5-1")
+    assert validate_multipart_hash(filepath, hash, "md5-1") is not None
+    assert validate_multipart_hash(filepath, *hash_file(filepath)[1:]) is not None
+
+
+def test_infer_multipart_part_sizes():
+    MiB = 1024**2
+    # upload_from uses 50 MiB parts unless there would be more than 10k parts
+    assert infer_multipart_part_sizes(120 * MiB, 3)[0] == 50 * MiB
+    assert infer_multipart_part_sizes(20 * MiB, 3)[0] == 8 * MiB
+    assert all(
+        math.ceil(1000 * MiB / part_size) == 7
+        for part_size in infer_multipart_part_sizes(1000 * MiB, 7)
+    )
+    assert infer_multipart_part_sizes(10, 20) == []
+
+
+def test_hash_from_hashes_list_spills_to_disk():
+    rng = random.Random(2)
+    hashes = [to_b64_str(rng.randbytes(16))[:HASH_LENGTH] for _ in range(1000)]
+    # the previous implementation that joins all digests in memory
+    digests = b"".join(hashlib.md5(h.encode()).digest() for h in sorted(hashes))
+    expected = to_b64_str(hashlib.md5(digests).digest())[:HASH_LENGTH]
+    assert hash_from_hashes_list(hashes) == expected
+    # every run holds only a few hashes and is spilled to a temporary file
+    assert hash_from_hashes_list(iter(hashes), max_memory=500) == expected
+    assert hash_from_hashes_list(reversed(hashes), max_memory=1) == expected
+
+
+def test_hash_codes(tmp_path):
+    contents = [b"", b"print('hello')\n", random.Random(3).randbytes(3 * BLOCK_SIZE)]
+    file_paths = []
+    for i, content in enumerate(contents):
+        file_path = tmp_path / f"script_{i}.py"
+        file_path.write_bytes(content)
+        file_paths.append(file_path)
+    expected = [
+        hashlib.sha1(f"blob {len(content)}\0".encode() + content).hexdigest()
+        for content in contents
+    ]
+    assert [hash_code(file_path).hexdigest() for file_path in file_paths] == expected
+    assert [h.hexdigest() for h in hash_codes(file_paths, n_workers=3)] == expected
+    assert hash_codes([]) == []
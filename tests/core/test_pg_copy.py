@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import struct
+from datetime import date, datetime, timedelta, timezone
+
+import pyarrow as pa
+from lamindb_setup._pg_copy import HEADER, TRAILER, encode_table
+
+
+def decode(buffer: bytes, pg_types: list[str]) -> list[list]:
+    """A reference decoder of the binary COPY format."""
+    assert buffer.startswith(HEADER)
+    assert buffer.endswith(TRAILER)
+    position = len(HEADER)
+    rows = []
+    while True:
+        (n_fields,) = struct.unpack_from(">h", buffer, position)
+        position += 2
+        if n_fields == -1:
+            break
+        assert n_fields == len(pg_types)
+        row = []
+        for pg_type in pg_types:
+            (length,) = struct.unpack_from(">i", buffer, position)
+            position += 4
+            if length == -1:
+                row.append(None)
+                continue
+            value = buffer[position : position + length]
+            position += length
+            if pg_type == "boolean":
+                row.append(value == b"\x01")
+            elif pg_type == "integer":
+                row.append(struct.unpack(">i", value)[0])
+            elif pg_type == "bigint":
+                row.append(struct.unpack(">q", value)[0])
+            elif pg_type == "double precision":
+                row.append(struct.unpack(">d", value)[0])
+            elif pg_type == "timestamp with time zone":
+                microseconds = struct.unpack(">q", value)[0]
+                row.append(
+                    datetime(2000, 1, 1, tzinfo=timezone.utc)
+                    + timedelta(microseconds=microseconds)
+                )
+            elif pg_type == "date":
+                row.append(
+                    date(2000, 1, 1) + timedelta(days=struct.unpack(">i", value)[0])
+                )
+            elif pg_type == "jsonb":
+                assert value[0] == 1
+                row.append(value[1:].decode())
+            else:
+                row.append(value.decode())
+        rows.append(row)
+    assert position == len(buffer)
+    return rows
+
+
+def test_encode_table_roundtrip():
+    rows = [
+        [
+            True,
+            1,
+            2**40,
+            1.5,
+            datetime(2024, 5, 1, 12, 30, 0, 123456, tzinfo=timezone.utc),
+            date(2024, 5, 1),
+            "ascii",
+            '{"a": [1, 2]}',
+        ],
+        [None, None, None, None, None, None, None, None],
+        [
+            False,
+            -7,
+            -1,
+            -0.25,
+            datetime(1999, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+            date(1970, 1, 1),
+            "",
+            "[]",
+        ],
+        [None, 3, None, None, None, None, "ünïcödé", None],
+    ]
+    pg_types = [
+        "boolean",
+        "integer",
+        "bigint",
+        "double precision",
+        "timestamp with time zone",
+        "date",
+        "text",
+        "jsonb",
+    ]
+    table = pa.table(
+        {
+            "bool": pa.array([row[0] for row in rows], pa.bool_()),
+            # encoded as int4 although it is int64 in arrow
+            "int": pa.array([row[1] for row in rows], pa.int64()),
+            "bigint": pa.array([row[2] for row in rows], pa.int64()),
+            "float": pa.array([row[3] for row in rows], pa.float64()),
+            "timestamp": pa.array([row[4] for row in rows], pa.timestamp("ns", "UTC")),
+            "date": pa.array([row[5] for row in rows], pa.date32()),
+            "text": pa.array([row[6] for row in rows], pa.string()),
+            "json": pa.array([row[7] for row in rows], pa.large_string()),
+        }
+    )
+
+    # batches smaller than the table and sliced arrays are encoded alike
+    for batch_size in (1, 3, 100):
+        buffer = b"".join(encode_table(table, pg_types, batch_size=batch_size))
+        assert decode(buffer, pg_types) == rows
+    buffer = b"".join(encode_table(table.slice(2), pg_types))
+    assert decode(buffer, pg_types) == rows[2:]
+
+
+def test_encode_table_all_null_column():
+    table = pa.table({"a": pa.nulls(3), "b": ["x", "y", "z"]})
+    pg_types = ["bigint", "character varying"]
+    buffer = b"".join(encode_table(table, pg_types))
+    assert decode(buffer, pg_types) == [[None, "x"], [None, "y"], [None, "z"]]
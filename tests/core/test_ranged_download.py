@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+from fsspec.asyn import AsyncFileSystem
+from fsspec.callbacks import Callback
+from lamindb_setup.core._ranged_download import (
+    STATE_SUFFIX,
+    RangeNotSupportedError,
+    download_ranged,
+    part_ranges,
+)
+from lamindb_setup.core.upath import UPath
+
+CONTENT = os.urandom(1000)
+
+
+class RangeFileSystem(AsyncFileSystem):
+    """An async filesystem serving `CONTENT` that records the requested ranges."""
+
+    protocol = "range-test"
+
+    def __init__(
+        self, ignore_range: bool = False, fail_at: int | None = None, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.ignore_range = ignore_range
+        self.fail_at = fail_at
+        self.requests: list[tuple[int, int]] = []
+
+    async def _cat_file(self, path, start=None, end=None, **kwargs):
+        self.requests.append((start, end))
+        if start == self.fail_at:
+            raise ConnectionError("connection reset")
+        return CONTENT if self.ignore_range else CONTENT[start:end]
+
+
+class RecordingCallback(Callback):
+    def __init__(self):
+        super().__init__()
+        self.children: list[Callback] = []
+
+    def branched(self, path_1, path_2, **kwargs):
+        child = Callback()
+        self.children.append(child)
+        return child
+
+
+def test_part_ranges():
+    assert part_ranges(10, 4) == [(0, 4), (4, 8), (8, 10)]
+    assert part_ranges(8, 4) == [(0, 4), (4, 8)]
+    assert part_ranges(0, 4) == []
+
+
+def test_download_ranged_async(tmp_path):
+    fs = RangeFileSystem(skip_instance_cache=True)
+    callback = RecordingCallback()
+    local_path = tmp_path / "file"
+    download_ranged(
+        fs,
+        "file",
+        local_path.as_posix(),
+        len(CONTENT),
+        part_size=300,
+        max_concurrency=2,
+        callback=callback,
+    )
+    assert local_path.read_bytes() == CONTENT
+    assert sorted(fs.requests) == [(0, 300), (300, 600), (600, 900), (900, 1000)]
+    assert callback.value == callback.size == 1
+    child = callback.children[0]
+    assert child.value == child.size == len(CONTENT)
+
+
+def test_download_ranged_checks_range_support(tmp_path):
+    fs = RangeFileSystem(ignore_range=True, skip_instance_cache=True)
+    local_path = tmp_path / "file"
+    with pytest.raises(RangeNotSupportedError, match="expected 300 bytes"):
+        download_ranged(
+            fs, "file", local_path.as_posix(), len(CONTENT), part_size=300, etag="v1"
+        )
+    # only the first part was requested and the incomplete file is removed
+    assert fs.requests == [(0, 300)]
+    assert not local_path.exists()
+    assert not (tmp_path / f"file{STATE_SUFFIX}").exists()
+
+
+def test_download_to_falls_back_if_range_is_ignored(tmp_path, monkeypatch):
+    path = UPath("memory://ranged-download-fallback/file")
+    path.write_bytes(CONTENT)
+    fs_class = type(path.fs)
+    cat_file = fs_class.cat_file
+
+    def cat_file_ignoring_range(self, path, start=None, end=None, **kwargs):
+        return cat_file(self, path)
+
+    monkeypatch.setattr(fs_class, "cat_file", cat_file_ignoring_range)
+    local_path = tmp_path / "new_dir/file"
+    path.download_to(local_path, print_progress=False, part_size=128)
+    assert local_path.read_bytes() == CONTENT
+    path.fs.rm(path.path)
+
+
+def test_download_to_ranged_sync_filesystem(tmp_path):
+    path = UPath("memory://ranged-download/file")
+    path.write_bytes(CONTENT)
+    # the parent directories are created
+    local_path = tmp_path / "new_dir/file"
+    path.download_to(local_path, print_progress=False, part_size=128)
+    assert local_path.read_bytes() == CONTENT
+    path.fs.rm(path.path)
+
+
+def test_download_ranged_resumes(tmp_path):
+    local_path = tmp_path / "file.partial"
+    state_path = tmp_path / f"file.partial{STATE_SUFFIX}"
+    fs = RangeFileSystem(fail_at=600, skip_instance_cache=True)
+    with pytest.raises(ConnectionError):
+        download_ranged(
+            fs,
+            "file",
+            local_path.as_posix(),
+            len(CONTENT),
+            part_size=300,
+            max_concurrency=1,
+            etag="v1",
+        )
+    # the partial file and the completed ranges are kept
+    assert local_path.exists()
+    completed = json.loads(state_path.read_text())["completed"]
+    # the part after the failed one may have completed before the cancellation
+    assert completed in ([[0, 600]], [[0, 600], [900, 1000]])
+
+    fs = RangeFileSystem(skip_instance_cache=True)
+    callback = RecordingCallback()
+    download_ranged(
+        fs,
+        "file",
+        local_path.as_posix(),
+        len(CONTENT),
+        part_size=300,
+        callback=callback,
+        etag="v1",
+    )
+    assert (0, 300) not in fs.requests and (300, 600) not in fs.requests
+    assert (600, 900) in fs.requests
+    assert local_path.read_bytes() == CONTENT
+    assert callback.children[0].value == len(CONTENT)
+    assert not state_path.exists()
+
+
+def test_download_ranged_restarts_if_etag_changed(tmp_path):
+    local_path = tmp_path / "file.partial"
+    fs = RangeFileSystem(fail_at=300, skip_instance_cache=True)
+    with pytest.raises(ConnectionError):
+        download_ranged(
+            fs,
+            "file",
+            local_path.as_posix(),
+            len(CONTENT),
+            part_size=300,
+            max_concurrency=1,
+            etag="v1",
+        )
+    fs = RangeFileSystem(skip_instance_cache=True)
+    download_ranged(
+        fs, "file", local_path.as_posix(), len(CONTENT), part_size=300, etag="v2"
+    )
+    assert len(fs.requests) == 4
+    assert local_path.read_bytes() == CONTENT
@@ -157,3 +157,12 @@ def test_get_storage_region():
         get_storage_region(UPath("s3://lamindb-setup-private-bucket/some-folder"))
         == "us-east-1"
     )
+
+
+def test_get_stat_dir_cloud_memory():
+    path = UPath("memory://stat-dir-cloud/")
+    for i in range(3):
+        (path / f"sub/file_{i}.txt").write_bytes(b"x" * (i + 1))
+    # no list hash for filesystems without object hashes
+    assert get_stat_dir_cloud(path) == (6, None, None, 3)
+    path.fs.rm(path.as_posix(), recursive=True)
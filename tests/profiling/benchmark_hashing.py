@@ -0,0 +1,225 @@
+"""Throughput benchmarks for lamindb_setup.core.hashing.
+
+Generates synthetic file trees, measures MiB/s, files/s and the peak RSS increase
+of the hashing functions and fails if throughput drops below the stored baseline.
+
+The baseline in `benchmark_hashing_baseline.json` is machine-dependent,
+regenerate it with `--update-baseline` on the reference machine.
+
+Usage::
+
+    python tests/profiling/benchmark_hashing.py  # small scale, compare with baseline
+    python tests/profiling/benchmark_hashing.py --scale full
+    python tests/profiling/benchmark_hashing.py --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import psutil
+from lamindb_setup.core.hashing import (
+    DEFAULT_CHUNK_SIZE,
+    HASH_LENGTH,
+    hash_dir,
+    hash_file,
+    hash_from_hashes_list,
+    to_b64_str,
+)
+from lamindb_setup.core.upath import UPath, get_stat_dir_cloud
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+BASELINE_FILE = Path(__file__).parent / "benchmark_hashing_baseline.json"
+MiB = 1024**2
+
+# the sizes of the synthetic trees
+SCALES = {
+    "small": {
+        "huge_file_size": 256 * MiB,
+        "n_medium_files": 1_000,
+        "medium_file_size": 256 * 1024,
+        "n_tiny_files": 20_000,
+        "n_hashes": 1_000_000,
+        "n_cloud_objects": 20_000,
+    },
+    "full": {
+        "huge_file_size": 4096 * MiB,
+        "n_medium_files": 10_000,
+        "medium_file_size": 1 * MiB,
+        "n_tiny_files": 1_000_000,
+        "n_hashes": 10_000_000,
+        "n_cloud_objects": 1_000_000,
+    },
+}
+
+
+class PeakRSS:
+    """Sample the resident set size in a background thread."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = self.process.memory_info().rss
+        self.peak = self.start
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+    @property
+    def increase_mib(self) -> float:
+        return (self.peak - self.start) / MiB
+
+
+def measure(func: Callable[[], object], n_bytes: int, n_files: int) -> dict:
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+    return {
+        "seconds": round(duration, 4),
+        "mib_per_s": round(n_bytes / MiB / duration, 2),
+        "files_per_s": round(n_files / duration, 2),
+        "peak_rss_increase_mib": round(rss.increase_mib, 2),
+    }
+
+
+def write_tree(root: Path, n_files: int, file_size: int, files_per_dir: int = 1000):
+    content = os.urandom(file_size)
+    for i in range(n_files):
+        directory = root / f"dir_{i // files_per_dir}"
+        if i % files_per_dir == 0:
+            directory.mkdir(parents=True)
+        # vary the content so that the hashes differ
+        (directory / f"file_{i}").write_bytes(i.to_bytes(8, "little") + content)
+
+
+def write_huge_file(path: Path, file_size: int):
+    block = os.urandom(8 * MiB)
+    with open(path, "wb") as f:
+        for _ in range(file_size // len(block)):
+            f.write(block)
+        f.write(block[: file_size % len(block)])
+
+
+def run_benchmarks(scale: dict, workdir: Path) -> dict[str, dict]:
+    results = {}
+
+    huge_file = workdir / "huge_file"
+    write_huge_file(huge_file, scale["huge_file_size"])
+    size = scale["huge_file_size"]
+    # the default hashes only the first and last chunks of large files
+    n_hashed = size if size <= DEFAULT_CHUNK_SIZE else 2 * DEFAULT_CHUNK_SIZE
+    results["hash_file_huge"] = measure(lambda: hash_file(huge_file), n_hashed, 1)
+    results["hash_file_huge_full"] = measure(
+        lambda: hash_file(huge_file, chunk_size=None), size, 1
+    )
+    huge_file.unlink()
+
+    medium_dir = workdir / "medium"
+    n_files = scale["n_medium_files"]
+    write_tree(medium_dir, n_files, scale["medium_file_size"])
+    size = n_files * (scale["medium_file_size"] + 8)
+    results["hash_dir_medium"] = measure(lambda: hash_dir(medium_dir), size, n_files)
+
+    tiny_dir = workdir / "tiny"
+    n_files = scale["n_tiny_files"]
+    write_tree(tiny_dir, n_files, 8)
+    size = n_files * 16
+    results["hash_dir_tiny"] = measure(lambda: hash_dir(tiny_dir), size, n_files)
+
+    n_hashes = scale["n_hashes"]
+    hashes = [to_b64_str(os.urandom(16))[:HASH_LENGTH] for _ in range(n_hashes)]
+    results["hash_from_hashes_list"] = measure(
+        lambda: hash_from_hashes_list(hashes), n_hashes * HASH_LENGTH, n_hashes
+    )
+    hashes.clear()
+
+    n_files = scale["n_cloud_objects"]
+    memory_dir = UPath("memory://benchmark-hashing/")
+    fs = memory_dir.fs
+    for i in range(n_files):
+        fs.pipe_file(f"{memory_dir.path}/dir_{i // 1000}/file_{i}", b"x")
+    results["get_stat_dir_cloud_memory"] = measure(
+        lambda: get_stat_dir_cloud(memory_dir), n_files, n_files
+    )
+    fs.rm(memory_dir.path, recursive=True)
+    n_files = scale["n_tiny_files"]
+    local_dir = UPath(tiny_dir.as_posix())
+    results["get_stat_dir_cloud_local"] = measure(
+        lambda: get_stat_dir_cloud(local_dir), n_files * 16, n_files
+    )
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    failures = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in ("mib_per_s", "files_per_s"):
+            expected = baseline[name][metric]
+            if result[metric] < expected * (1 - tolerance):
+                failures.append(
+                    f"{name}: {metric} {result[metric]} is below the baseline"
+                    f" {expected} by more than {tolerance:.0%}"
+                )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="The allowed relative throughput regression.",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_benchmarks(SCALES[args.scale], Path(workdir))
+    print(json.dumps(results, indent=2))
+
+    baselines = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    if args.update_baseline:
+        baselines[args.scale] = results
+        BASELINE_FILE.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"updated the baseline in {BASELINE_FILE}")
+        return 0
+    if args.scale not in baselines:
+        print(f"no baseline for the scale {args.scale}, skipping the comparison")
+        return 0
+    failures = compare(results, baselines[args.scale], args.tolerance)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())